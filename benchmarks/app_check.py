@@ -0,0 +1,117 @@
+"""Executa o dashboard com o AppTest do Streamlit lendo as planilhas em paralelo.
+
+Gera um corpus sintético, aponta uma cópia do dashboard para ele (pasta, cache
+e ``PARSE_WORKERS``) e confere, na carga progressiva e na que espera a leitura,
+que a página termina de carregar sem exceções e com todas as faturas. Os
+processos de leitura (spawn) reimportam o script do dashboard: se a página
+rodar fora do ``main()``, o pool quebra e a carga nunca termina.
+
+Uso:
+    python -m benchmarks.app_check [--workers 4] [--files 6] [--rows 2000]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.rel441_corpus import write_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tempo máximo (s) para a página terminar de carregar
+LOAD_TIMEOUT = 300
+
+
+def dashboard_copy(folder, data_path, cache_dir, workers, progressive):
+    """Grava em ``folder`` o dashboard com as constantes trocadas e devolve o caminho."""
+    with open(os.path.join(ROOT, 'fatura_dashboard.py'), encoding='utf-8') as fh:
+        source = fh.read()
+    constants = {
+        'DATA_PATH': repr(data_path),
+        'CACHE_DIR': repr(cache_dir),
+        'PARSE_WORKERS': str(workers),
+        # As planilhas acabaram de ser gravadas: sem espera para lê-las
+        'REFRESH_DEBOUNCE': '0',
+        'PROGRESSIVE_LOADING': str(progressive),
+    }
+    for name, value in constants.items():
+        source, count = re.subn(rf'^{name} = .*$', lambda _: f'{name} = {value}', source, flags=re.MULTILINE)
+        if count != 1:
+            raise RuntimeError(f"constante {name} não encontrada no dashboard")
+    path = os.path.join(folder, 'fatura_dashboard.py')
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(source)
+    return path
+
+
+def invoice_count(app):
+    # Primeiro cartão: total de faturas
+    for markdown in app.markdown:
+        match = re.search(r'card-value">\s*(\d+)\s*<', markdown.value)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def run_app(path, timeout):
+    """Executa a página até a carga terminar; devolve (faturas, exceções, segundos)."""
+    app = AppTest.from_file(path, default_timeout=timeout)
+    started = time.perf_counter()
+    while True:
+        app.run()
+        errors = [exception.value for exception in app.exception]
+        count = invoice_count(app)
+        if errors or (count is not None and not app.get('progress')):
+            return count, errors, time.perf_counter() - started
+        if time.perf_counter() - started > timeout:
+            return None, [f"carga não terminou em {timeout}s"], time.perf_counter() - started
+        time.sleep(0.5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa o dashboard com leitura paralela das planilhas.")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--files', type=int, default=6)
+    parser.add_argument('--rows', type=int, default=2_000)
+    parser.add_argument('--timeout', type=float, default=LOAD_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    # O AppTest só põe a pasta do script no sys.path durante cada execução; os
+    # processos iniciados depois pela thread de carga herdam o sys.path daqui
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'planilhas')
+        write_corpus(data_dir, files=args.files, rows=args.rows)
+        expected = args.files * args.rows
+        for progressive in (True, False):
+            # Cada modo com o seu cache e o seu carregador
+            st.cache_resource.clear()
+            folder = os.path.join(tmp, 'progressiva' if progressive else 'bloqueante')
+            os.makedirs(folder)
+            path = dashboard_copy(
+                folder, os.path.join(data_dir, '*.xlsx'), os.path.join(folder, 'cache'), args.workers, progressive
+            )
+            count, errors, seconds = run_app(path, args.timeout)
+            mode = 'progressiva' if progressive else 'bloqueante'
+            print(f"carga {mode:12} {args.workers} processos: {count} faturas em {seconds:.1f}s")
+            failures += [f"carga {mode}: {error}" for error in errors]
+            if not errors and count != expected:
+                failures.append(f"carga {mode}: {count} faturas (esperadas {expected})")
+        st.cache_resource.clear()
+
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Compara as engines de leitura das planilhas num corpus sintético do Rel_441.
+
+Cada engine lê todas as planilhas com ``parse_report`` (cabeçalho, colunas,
+esquema), sequencialmente; o resultado normalizado é conferido contra o da
+engine de referência (openpyxl).
+
+Uso: python -m benchmarks.bench_engines --files 5 --rows 20000 [--output engines.json]
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.rel441_corpus import write_corpus
+from fatura_ingest import EXCEL_ENGINES, FALLBACK_ENGINE, SOURCE_COLUMN, engine_available, parse_report
+
+
+def bench_engine(paths, engine):
+    frames, seconds, engines = [], [], set()
+    for path in paths:
+        started = time.perf_counter()
+        result = parse_report(path, engine=engine)
+        seconds.append(time.perf_counter() - started)
+        if result.error:
+            raise RuntimeError(f"{path}: {result.error}")
+        engines.add(result.engine)
+        frames.append(result.frame.drop(columns=SOURCE_COLUMN))
+    return pd.concat(frames, ignore_index=True), seconds, engines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--folder', help="pasta do corpus (padrão: temporária)")
+    parser.add_argument('--output', help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_corpus(args.folder or tmp, args.files, args.rows)
+        reference, results = None, []
+        # A engine de referência roda primeiro
+        for engine in sorted(EXCEL_ENGINES, key=lambda engine: engine != FALLBACK_ENGINE):
+            if not engine_available(engine):
+                print(f"{engine}: não instalada")
+                continue
+            frame, seconds, used = bench_engine(paths, engine)
+            reference = frame if reference is None else reference
+            same = frame.astype({'Cliente': 'string'}).equals(reference.astype({'Cliente': 'string'}))
+            rows = len(frame)
+            results.append({
+                'engine': engine,
+                'engines_used': sorted(used),
+                'files': len(paths),
+                'rows': rows,
+                'seconds': sum(seconds),
+                'rows_per_second': rows / sum(seconds),
+                'slowest_file_seconds': max(seconds),
+                'matches_reference': bool(same)
+            })
+            print(
+                f"{engine:>9}: {sum(seconds):7.2f}s  {rows / sum(seconds):10,.0f} linhas/s  "
+                f"{'igual' if same else 'DIFERENTE'} à referência"
+            )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'python': platform.python_version(), 'pandas': pd.__version__, 'results': results}, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Tempos de cada etapa do dashboard sobre dados sintéticos do Rel_441.
+
+Etapas: load (leitura das planilhas), normalize (esquema e mescla), index
+(cubo e índices), filter, aggregate, search, format e export. Todas são
+chamadas como funções, sem o Streamlit, com os mesmos módulos usados pelo
+dashboard. A leitura de planilhas só roda até ``--max-load-rows`` linhas
+(gravar e ler milhões de linhas em xlsx leva horas) e aparece como ignorada
+acima disso; as demais etapas usam dados gerados direto em memória.
+
+Uso:
+    python -m benchmarks.bench_stages --rows 10000 1000000 10000000 --output bench.json
+    python -m benchmarks.bench_stages --rows 10000 --baseline bench.json
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.rel441_corpus import generate_rows, write_corpus
+from fatura_format import format_brl_array, status_icons
+from fatura_ingest import SOURCE_COLUMN, normalize_frame, parse_reports
+from fatura_refresh import Dataset
+from fatura_schema import concat_frames
+from fatura_source import FrameView, InvoiceFilter
+
+# Linhas por planilha gerada (e por bloco normalizado quando não há leitura de xlsx)
+ROWS_PER_FILE = 100_000
+
+# Textos buscados na etapa search
+SEARCH_TERMS = ['00042', 'cliente 0001', '1.234', '/03/2022', 'aberto']
+
+# Variação tolerada em relação ao baseline antes de acusar regressão
+REGRESSION_TOLERANCE = 0.25
+
+
+class StageTimer:
+    """Acumula os tempos das etapas; cada etapa roda ``repeat`` vezes e guarda o melhor tempo."""
+
+    def __init__(self, rows, repeat=3):
+        self.rows = rows
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, stage, function, rows_in, repeat=None):
+        best, result = None, None
+        for _ in range(repeat or self.repeat):
+            gc.collect()
+            started = time.perf_counter()
+            try:
+                result = function()
+            except MemoryError as e:
+                # Registra a falha; main segue para o próximo tamanho
+                self.results.append({'rows': self.rows, 'stage': stage, 'error': f"{type(e).__name__}: {e}"})
+                print(f"{self.rows:>11,} {stage:<32} {'sem memória':>13}  ({e})")
+                raise
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        rows_out = result if isinstance(result, int) else len(result) if hasattr(result, '__len__') else None
+        self.record(stage, best, rows_in, rows_out)
+        return result
+
+    def record(self, stage, seconds, rows_in, rows_out):
+        self.results.append({
+            'rows': self.rows, 'stage': stage, 'seconds': seconds, 'rows_in': rows_in, 'rows_out': rows_out
+        })
+        out = f"{rows_out:,}" if rows_out is not None else '-'
+        print(f"{self.rows:>11,} {stage:<32} {seconds * 1000:10.1f} ms  {rows_in:>11,} -> {out}")
+
+    def skip(self, stage, reason):
+        self.results.append({'rows': self.rows, 'stage': stage, 'skipped': reason})
+        print(f"{self.rows:>11,} {stage:<32} {'ignorada':>13}  ({reason})")
+
+
+def merge(frames):
+    # Mesma mescla do IncrementalLoader: categorias unificadas e ordem por vencimento
+    merged = concat_frames(frames, categorical=('Cliente', SOURCE_COLUMN))
+    return merged.sort_values('Vencimento', kind='stable', ignore_index=True)
+
+
+def load_stage(timer, rows, folder, engine, workers):
+    # Leitura completa das planilhas (cabeçalho, colunas e esquema), como no IncrementalLoader
+    files = max(1, -(-rows // ROWS_PER_FILE))
+    paths = write_corpus(folder, files, rows // files)
+
+    def load():
+        results = parse_reports(paths, workers=workers, engine=engine)
+        errors = [result.error for result in results if result.error]
+        if errors:
+            raise RuntimeError(errors[0])
+        return sum(len(result.frame) for result in results)
+
+    timer.run(f'load[{engine}]', load, rows, repeat=1)
+
+
+def normalize_stage(timer, rows):
+    # Blocos gerados em memória e normalizados como as planilhas lidas; só a
+    # normalização entra no tempo, a geração dos dados não
+    frames, seconds = [], 0.0
+    for first in range(0, rows, ROWS_PER_FILE):
+        raw = generate_rows(min(ROWS_PER_FILE, rows - first), seed=first, first_id=first)
+        started = time.perf_counter()
+        frames.append(normalize_frame(raw, f"rel441_{first // ROWS_PER_FILE:04d}.xlsx")[0])
+        seconds += time.perf_counter() - started
+    timer.record('normalize', seconds, rows, sum(len(frame) for frame in frames))
+    return timer.run('normalize[merge]', lambda: merge(frames), rows, repeat=1)
+
+
+def filter_cases(frame):
+    # Filtros representativos: tudo, último ano, um status, os 5 maiores clientes
+    first, last = frame['Vencimento'].iloc[0].date(), frame['Vencimento'].iloc[-1].date()
+    top_clients = tuple(frame['Cliente'].value_counts().index[:5])
+    return {
+        'all': InvoiceFilter(first, last),
+        'last_year': InvoiceFilter(last - timedelta(days=365), last),
+        'open': InvoiceFilter(first, last, ('Em aberto',)),
+        'top_clients': InvoiceFilter(first, last, (), top_clients),
+    }
+
+
+def query_stages(timer, frame, export_formats):
+    rows = len(frame)
+    dataset = timer.run('index', lambda: Dataset.build(frame, 'bench'), rows, repeat=1)
+    cases = filter_cases(frame)
+
+    # Visões novas a cada execução: sem resultados em cache
+    for name, filters in cases.items():
+        timer.run(f'filter[{name}]', lambda filters=filters: FrameView(dataset).count(filters), rows)
+    for name, filters in cases.items():
+        timer.run(f'aggregate[summary,{name}]', lambda filters=filters: FrameView(dataset).summary(filters).count, rows)
+    for freq in ('D', 'M', 'Y'):
+        timer.run(
+            f'aggregate[period,{freq}]',
+            lambda freq=freq: FrameView(dataset).period_summary(cases['all'], freq), rows
+        )
+    for term in SEARCH_TERMS:
+        filters = InvoiceFilter(cases['all'].start_date, cases['all'].end_date, search=term)
+        # Uma execução: o SearchIndex guarda os resultados de cada texto buscado
+        timer.run(f'search[{term}]', lambda filters=filters: FrameView(dataset).count(filters), rows, repeat=1)
+
+    timer.run('format[brl]', lambda: format_brl_array(frame['Valor']), rows)
+    timer.run('format[status]', lambda: status_icons(frame['Status']), rows)
+    page = timer.run('format[page]', lambda: FrameView(dataset).page(cases['all'], 0, 100), rows)
+
+    view = FrameView(dataset)
+    exported = view.count(cases['last_year'])
+    for export_format, max_rows in export_formats.items():
+        if exported > max_rows:
+            timer.skip(f'export[{export_format}]', f"{exported:,} linhas > {max_rows:,}")
+            continue
+
+        def export(export_format=export_format):
+            view.export(cases['last_year'], export_format)
+            return exported
+
+        timer.run(f'export[{export_format}]', export, exported, repeat=1)
+    return page
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine()
+    }
+
+
+def compare(results, baseline_path, tolerance=REGRESSION_TOLERANCE):
+    """Lista as etapas mais lentas que no baseline além da tolerância."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {
+            (result['rows'], result['stage']): result['seconds']
+            for result in json.load(fh)['results'] if 'seconds' in result
+        }
+    regressions = []
+    for result in results:
+        before = baseline.get((result['rows'], result['stage']))
+        if before and 'seconds' in result and result['seconds'] > before * (1 + tolerance):
+            regressions.append((result['rows'], result['stage'], before, result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempos das etapas do dashboard em dados sintéticos.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-load-rows', type=int, default=200_000,
+                        help="acima disso a etapa load (xlsx) é ignorada")
+    parser.add_argument('--engine', default='calamine', help="engine de leitura na etapa load")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-excel-rows', type=int, default=100_000,
+                        help="exportação em Excel só até esse número de linhas")
+    parser.add_argument('--output', help="grava os resultados em JSON")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    export_formats = {'CSV': float('inf'), 'Parquet': float('inf'), 'Excel': args.max_excel_rows}
+    results = []
+    for rows in args.rows:
+        timer = StageTimer(rows)
+        try:
+            if rows <= args.max_load_rows:
+                with tempfile.TemporaryDirectory() as folder:
+                    load_stage(timer, rows, folder, args.engine, args.workers)
+            else:
+                timer.skip(f'load[{args.engine}]', f"{rows:,} linhas > --max-load-rows")
+            frame = normalize_stage(timer, rows)
+            query_stages(timer, frame, export_formats)
+            del frame
+        except MemoryError:
+            pass
+        results.extend(timer.results)
+        gc.collect()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'environment': environment(), 'results': results}, fh, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline)
+        for rows, stage, before, after in regressions:
+            print(f"REGRESSÃO {rows:,} {stage}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Tempo de importação do dashboard, medido com ``python -X importtime``.
+
+Executa num processo novo só os imports de nível de módulo do ponto de
+entrada (o script não roda: sem Streamlit em execução ele tentaria carregar
+os dados) e confere dois limites: o tempo total, no melhor de ``--repeat``
+execuções, e a lista de módulos pesados que só devem ser carregados pelos
+painéis que os usam.
+
+Uso:
+    python -m benchmarks.import_budget [--budget-ms 1500] [--entry fatura_dashboard.py]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tempo máximo dos imports do ponto de entrada
+IMPORT_BUDGET_MS = 1500
+
+# Módulos que não podem ser carregados na abertura do dashboard
+LAZY_MODULES = [
+    'plotly.express',
+    'openpyxl',
+    'python_calamine',
+    'xlsxwriter',
+    'duckdb',
+    'pyarrow.parquet',
+    'pyarrow.dataset',
+    'psutil'
+]
+
+
+def entry_imports(path):
+    """Comandos import de nível de módulo do script (os de dentro de funções ficam de fora)."""
+    with open(path, encoding='utf-8') as fh:
+        tree = ast.parse(fh.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def parse_importtime(stderr):
+    """Linhas do -X importtime -> {módulo de primeiro nível: tempo acumulado em segundos}."""
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Módulos importados diretamente pelo script não têm recuo no nome
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative) / 1e6
+    return top_level
+
+
+def measure(imports):
+    code = '\n'.join(imports + ['import json, sys', 'print(json.dumps(sorted(sys.modules)))'])
+    done = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(done.stderr), set(json.loads(done.stdout.splitlines()[-1]))
+
+
+def startup_modules():
+    # Módulos da inicialização do interpretador (site, encodings...), fora da conta
+    done = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'pass'], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return set(parse_importtime(done.stderr))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confere o tempo de importação do dashboard.")
+    parser.add_argument('--entry', default=os.path.join(ROOT, 'fatura_dashboard.py'))
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=3, help="execuções; vale a mais rápida")
+    parser.add_argument('--top', type=int, default=10, help="imports mais lentos exibidos")
+    args = parser.parse_args(argv)
+
+    imports = entry_imports(args.entry)
+    startup = startup_modules()
+    # A primeira execução também compila os .pyc; por isso vale a mais rápida
+    runs = []
+    for _ in range(args.repeat):
+        timings, modules = measure(imports)
+        runs.append(({name: seconds for name, seconds in timings.items() if name not in startup}, modules))
+    timings, modules = min(runs, key=lambda run: sum(run[0].values()))
+    total = sum(timings.values())
+
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{seconds * 1000:10.1f} ms  {name}")
+    print(f"{total * 1000:10.1f} ms  total (limite {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if total * 1000 > args.budget_ms:
+        failures.append(f"imports levaram {total * 1000:.0f} ms (limite {args.budget_ms:.0f} ms)")
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    if loaded:
+        failures.append(f"módulos que deveriam ser carregados sob demanda: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
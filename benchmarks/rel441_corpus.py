@@ -0,0 +1,95 @@
+"""Gerador de planilhas sintéticas no formato do Rel_441.
+
+As planilhas têm as colunas FATURA, CLIENTE, VLR FATUR, VENCIMEN e
+LIQUIDADA/ATRASADA, mais algumas colunas extras, e misturam os formatos
+encontrados nos relatórios reais: vencimentos como data, número serial do
+Excel ou texto "dd/mm/aaaa", valores como número ou texto "1.234,56" e
+status com espaços e maiúsculas variadas.
+
+Uso: python -m benchmarks.rel441_corpus PASTA --files 10 --rows 10000 [--clients 5000 --days 2190]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+HEADER = ['FATURA', 'CLIENTE', 'VLR FATUR', 'VENCIMEN', 'LIQUIDADA/ATRASADA', 'FILIAL', 'OBS']
+
+STATUS_VALUES = ['LIQUIDADO', 'ATRASADO', 'liquidado', ' Atrasado ']
+
+# Data zero dos números seriais do Excel
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+
+def generate_rows(rows, seed=0, clients=5_000, first_id=0, start='2019-01-01', days=6 * 365,
+                  mixed_fraction=0.05):
+    """Tabela com as colunas de HEADER; ``mixed_fraction`` das células em formatos alternativos."""
+    rng = np.random.default_rng(seed)
+    # Poucos clientes concentram a maior parte das faturas (distribuição de Zipf)
+    client_codes = np.minimum(rng.zipf(1.3, rows), clients) - 1
+    names = np.array([f"CLIENTE {code:05d} LTDA" for code in range(clients)], dtype=object)
+    due = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, rows), unit='D')
+    values = np.round(rng.lognormal(7.5, 1.2, rows), 2)
+
+    vencimento = np.array(due.to_pydatetime(), dtype=object)
+    valor = values.astype(object)
+    mixed = rng.random(rows) < mixed_fraction
+    serial = mixed & (rng.random(rows) < 0.5)
+    text = mixed & ~serial
+    vencimento[serial] = (due[serial] - EXCEL_EPOCH).days.astype(float)
+    vencimento[text] = due[text].strftime('%d/%m/%Y')
+    valor[text] = [f"{value:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.') for value in values[text]]
+
+    return pd.DataFrame({
+        'FATURA': np.arange(first_id, first_id + rows),
+        'CLIENTE': names[client_codes],
+        'VLR FATUR': valor,
+        'VENCIMEN': vencimento,
+        'LIQUIDADA/ATRASADA': np.array(STATUS_VALUES, dtype=object)[rng.integers(0, len(STATUS_VALUES), rows)],
+        'FILIAL': rng.integers(1, 30, rows),
+        'OBS': np.where(rng.random(rows) < 0.1, 'REPACTUADA', None)
+    }, columns=HEADER)
+
+
+def write_workbook(path, df, title_rows=0):
+    """Grava ``df`` com openpyxl em modo write-only, com ``title_rows`` linhas de título acima do cabeçalho."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Rel_441')
+    for row in range(title_rows):
+        sheet.append(['Relatório 441 - Faturas emitidas' if row == 0 else None])
+    sheet.append(list(df.columns))
+    for record in df.itertuples(index=False, name=None):
+        sheet.append([None if value is None or value is pd.NaT else value for value in record])
+    workbook.save(path)
+
+
+def write_corpus(folder, files=10, rows=10_000, seed=0, **options):
+    """Grava ``files`` planilhas com ``rows`` linhas cada e devolve os caminhos."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = os.path.join(folder, f"rel441_{index:04d}.xlsx")
+        df = generate_rows(rows, seed=seed + index, first_id=index * rows, **options)
+        write_workbook(path, df, title_rows=index % 3)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas do Rel_441.")
+    parser.add_argument('folder')
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--clients', type=int, default=5_000, help="clientes distintos")
+    parser.add_argument('--days', type=int, default=6 * 365, help="dias entre o primeiro e o último vencimento")
+    args = parser.parse_args(argv)
+    paths = write_corpus(args.folder, args.files, args.rows, args.seed, clients=args.clients, days=args.days)
+    print(f"{len(paths)} planilhas gravadas em {args.folder}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Atraso (aging) das faturas em aberto em relação a uma data de referência.
+
+Dias em atraso = data de referência - vencimento. As faturas em aberto são
+divididas nas faixas 0-30, 31-60, 61-90 e >90 dias; as que ainda não
+venceram ficam em "A vencer". Tudo é calculado numa passada vetorizada sobre
+os vencimentos (``datetime64``): linhas da tabela ou, no dashboard, células
+do cubo (dia x cliente), que já trazem soma e quantidade.
+"""
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Status das faturas que entram no aging
+OPEN_STATUS = 'Em aberto'
+
+# Faixas de atraso; a primeira é a das faturas que ainda não venceram
+AGING_BUCKETS = pd.Index(['A vencer', '0-30', '31-60', '61-90', '>90'], name='Faixa')
+
+# Primeiro dia de atraso de cada faixa depois de "A vencer"
+BUCKET_STARTS = np.array([0, 31, 61, 91])
+
+# Colunas acrescentadas na exportação
+DAYS_COLUMN = 'Dias em atraso'
+BUCKET_COLUMN = 'Faixa de atraso'
+AGING_COLUMNS = [DAYS_COLUMN, BUCKET_COLUMN]
+
+# Granularidade do período -> unidade de datetime64 (a mesma de fatura_cube)
+FREQ_UNITS = {'D': 'D', 'M': 'M', 'Y': 'Y'}
+
+
+# Nanossegundos por dia, para truncar datetime64[ns] em dias com aritmética inteira
+NS_PER_DAY = 86_400 * 10**9
+
+
+def day_numbers(vencimento):
+    """Dias desde 1970-01-01 (int64); vencimentos em datetime64[ns] sem conversão de calendário."""
+    values = np.asarray(vencimento)
+    if values.dtype == np.dtype('datetime64[ns]'):
+        return values.view(np.int64) // NS_PER_DAY
+    return values.astype('datetime64[D]').astype(np.int64)
+
+
+def days_overdue(vencimento, reference):
+    """Dias entre o vencimento e ``reference``; negativo se ainda não venceu."""
+    return np.datetime64(reference, 'D').astype(np.int64) - day_numbers(vencimento)
+
+
+def bucket_codes(days):
+    """Posição da faixa em AGING_BUCKETS: 0 a vencer, 1 de 0 a 30 dias, ..., 4 acima de 90."""
+    return np.searchsorted(BUCKET_STARTS, days, side='right')
+
+
+@dataclass(frozen=True)
+class AgingSummary:
+    """Faturas em aberto por faixa de atraso: totais, por cliente e por período."""
+    reference: date
+    counts: np.ndarray
+    values: np.ndarray
+    # Valor por cliente x faixa, clientes com mais valor vencido primeiro
+    by_client: pd.DataFrame
+    # Valor por período do vencimento x faixa, em ordem cronológica
+    by_period: pd.DataFrame
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+
+def _by_bucket(codes, size, buckets, values, counts):
+    # Valor e quantidade por grupo (códigos 0..size-1) x faixa, uma bincount para cada
+    width = len(AGING_BUCKETS)
+    flat = codes.astype(np.intp) * width + buckets
+    sums = np.bincount(flat, weights=values, minlength=size * width).reshape(size, width)
+    totals = np.bincount(flat, weights=counts, minlength=size * width).reshape(size, width)
+    return sums, totals
+
+
+def aging_summary(vencimento, clients, values, reference, counts=None, freq='M'):
+    """Aging das faturas (ou células agregadas) em aberto.
+
+    ``vencimento`` em datetime64, ``clients`` como ``pd.Categorical`` (ou
+    valores que viram um), ``values`` a soma de Valor e ``counts`` a quantidade
+    de faturas de cada item (1 por item quando omitido).
+    """
+    clients = clients if isinstance(clients, pd.Categorical) else pd.Categorical(clients)
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.ones(len(values)) if counts is None else np.asarray(counts, dtype=np.float64)
+
+    # Faixa e período são calculados uma vez por dia do calendário coberto (poucos
+    # milhares de dias) e levados às linhas por posição, sem conversões por linha
+    days = day_numbers(vencimento)
+    first = int(days.min()) if len(days) else 0
+    offsets = days - first
+    calendar = np.datetime64(first, 'D') + np.arange(int(offsets.max()) + 1 if len(days) else 0)
+    buckets = bucket_codes(days_overdue(calendar, reference))[offsets]
+
+    # Faturas sem cliente (código -1) entram nos totais, mas não na tabela por cliente
+    client_codes = clients.codes
+    if len(client_codes) and client_codes.min() < 0:
+        named = client_codes >= 0
+        client_sums, client_counts = _by_bucket(
+            client_codes[named], len(clients.categories), buckets[named], values[named], counts[named]
+        )
+    else:
+        client_sums, client_counts = _by_bucket(client_codes, len(clients.categories), buckets, values, counts)
+    present = client_counts.sum(axis=1) > 0
+    by_client = pd.DataFrame(
+        client_sums[present],
+        index=pd.Index(clients.categories[present], dtype=object, name='Cliente'),
+        columns=AGING_BUCKETS
+    )
+    by_client = by_client.iloc[np.argsort(-client_sums[present, 1:].sum(axis=1), kind='stable')]
+
+    # Períodos numerados a partir do primeiro: bincount em vez de ordenar os vencimentos
+    unit = FREQ_UNITS[freq]
+    steps = calendar.astype(f"datetime64[{unit}]").astype(np.int64)
+    start = int(steps[0]) if len(steps) else 0
+    span = int(steps[-1]) - start + 1 if len(steps) else 0
+    period_sums, period_counts = _by_bucket((steps - start)[offsets], span, buckets, values, counts)
+    present = period_counts.sum(axis=1) > 0
+    labels = np.datetime64(start, unit) + np.arange(span)
+    by_period = pd.DataFrame(
+        period_sums[present],
+        index=pd.DatetimeIndex(labels[present].astype('datetime64[ns]'), name='Periodo'),
+        columns=AGING_BUCKETS
+    )
+    # Totais por faixa a partir da tabela por período, que cobre todas as faturas
+    return AgingSummary(
+        reference,
+        np.rint(period_counts.sum(axis=0)).astype(np.int64),
+        period_sums.sum(axis=0),
+        by_client,
+        by_period
+    )
+
+
+def empty_aging(reference):
+    """Aging sem faturas (por exemplo, com o filtro de status só em "Paga")."""
+    return aging_summary(np.empty(0, dtype='datetime64[ns]'), [], [], reference)
+
+
+def add_aging_columns(chunk, reference):
+    """Acrescenta dias em atraso e faixa às linhas exportadas.
+
+    Faturas pagas ficam sem os dois valores; as em aberto que ainda não
+    venceram ficam sem dias em atraso e com a faixa "A vencer".
+    """
+    days = days_overdue(chunk['Vencimento'].to_numpy(), reference)
+    open_rows = (chunk['Status'] == OPEN_STATUS).to_numpy()
+    buckets = np.where(open_rows, bucket_codes(days), -1)
+    return chunk.assign(**{
+        DAYS_COLUMN: pd.Series(days, index=chunk.index, dtype='Int64').where(open_rows & (days >= 0)),
+        BUCKET_COLUMN: pd.Categorical.from_codes(buckets, categories=AGING_BUCKETS)
+    })
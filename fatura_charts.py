@@ -0,0 +1,30 @@
+"""Preparação dos gráficos: limite de pontos por série.
+
+Séries com mais períodos do que o limite são agrupadas em blocos de períodos
+consecutivos (somando os valores), então o JSON enviado ao navegador tem
+tamanho limitado qualquer que seja o intervalo e o agrupamento escolhidos.
+"""
+import numpy as np
+import pandas as pd
+
+
+def downsample(period_summary, max_points):
+    """Agrupa períodos consecutivos em no máximo ``max_points`` blocos (valores somados).
+
+    O rótulo de cada bloco é ``"primeiro a último"`` período do bloco.
+    """
+    size = len(period_summary)
+    if size <= max_points:
+        return period_summary
+    step = -(-size // max_points)
+    blocks = np.arange(size) // step
+    grouped = period_summary.groupby(blocks).sum()
+    labels = period_summary.index.astype(str)
+    first = labels[::step]
+    last = labels[np.minimum(np.arange(len(first)) * step + step - 1, size - 1)]
+    grouped.index = pd.Index(
+        [a if a == b else f"{a} a {b}" for a, b in zip(first, last)],
+        name=period_summary.index.name
+    )
+    return grouped
+
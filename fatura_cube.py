@@ -0,0 +1,72 @@
+"""Cubo pré-agregado de faturas por dia x Status x Cliente.
+
+Montado uma vez por versão dos dados, guarda a soma de ``Valor`` e a
+quantidade de faturas de cada combinação. As visões por dia, mês e ano do
+gráfico de barras são consolidadas a partir do cubo, que tem poucas células
+mesmo quando a tabela tem milhões de linhas.
+"""
+import numpy as np
+import pandas as pd
+
+from fatura_query import StatusSummary
+
+# Granularidade do período -> unidade de datetime64 usada para truncar o dia
+FREQ_UNITS = {'D': 'D', 'M': 'M', 'Y': 'Y'}
+
+
+class InvoiceCube:
+
+    def __init__(self, df):
+        keys = pd.DataFrame({
+            'day': df['Vencimento'].to_numpy().astype('datetime64[D]'),
+            'status': df['Status'].cat.codes.to_numpy(),
+            'client': df['Cliente'].cat.codes.to_numpy(),
+            'valor': df['Valor'].to_numpy()
+        })
+        cells = keys.groupby(['day', 'status', 'client'], sort=True)['valor'].agg(['sum', 'count'])
+        self.statuses = df['Status'].cat.categories
+        self.day = cells.index.get_level_values('day').to_numpy().astype('datetime64[D]')
+        self.status = cells.index.get_level_values('status').to_numpy()
+        self.client = cells.index.get_level_values('client').to_numpy()
+        self.total = cells['sum'].to_numpy()
+        self.count = cells['count'].to_numpy()
+
+    def __len__(self):
+        return len(self.day)
+
+    def select(self, start_date, end_date, statuses=None, client_codes=None):
+        """Posições das células dentro do intervalo de datas e dos filtros."""
+        start = self.day.searchsorted(np.datetime64(start_date, 'D'), 'left')
+        stop = self.day.searchsorted(np.datetime64(end_date, 'D'), 'right')
+        cells = np.arange(start, stop)
+        if statuses:
+            codes = self.statuses.get_indexer(list(statuses))
+            cells = cells[np.isin(self.status[cells], codes)]
+        if client_codes is not None:
+            cells = cells[np.isin(self.client[cells], client_codes)]
+        return cells
+
+    def summary(self, start_date, end_date, statuses=None, client_codes=None):
+        """Resumo por status (quantidade e valor) calculado só a partir do cubo."""
+        cells = self.select(start_date, end_date, statuses, client_codes)
+        return StatusSummary.from_codes(
+            self.statuses, self.status[cells], self.total[cells], self.count[cells]
+        )
+
+    def period_summary(self, start_date, end_date, freq='D', statuses=None, client_codes=None):
+        """Soma de ``Valor`` por período e status, com os períodos em ordem cronológica.
+
+        O índice traz o início de cada período (``datetime64``) e há uma coluna
+        para cada status, mesmo quando não há faturas com ele.
+        """
+        cells = self.select(start_date, end_date, statuses, client_codes)
+        periods = self.day[cells].astype(f"datetime64[{FREQ_UNITS[freq]}]")
+        index, period_codes = np.unique(periods, return_inverse=True)
+        width = len(self.statuses)
+        flat = period_codes * width + self.status[cells]
+        sums = np.bincount(flat, weights=self.total[cells], minlength=len(index) * width)
+        return pd.DataFrame(
+            sums.reshape(len(index), width),
+            index=pd.DatetimeIndex(index.astype('datetime64[ns]'), name='Periodo'),
+            columns=self.statuses
+        )
@@ -1,18 +1,20 @@
+# Só o necessário para a primeira tela; backends de gráfico, engines de Excel e
+# escritores de exportação são importados nas funções que os usam
+# (limite verificado por benchmarks/import_budget.py)
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import os
-import glob
-
-# Configuração da página
-st.set_page_config(
-    page_title="Dashboard de Faturas",
-    page_icon="💳",
-    layout="wide"
-)
+import dataclasses
+import uuid
+from datetime import date
+from fatura_aging import AGING_BUCKETS
+from fatura_charts import downsample
+from fatura_export import EXPORT_FORMATS, ExportProgress
+from fatura_format import format_brl, status_icons
+from fatura_ingest import IncrementalLoader, SnapshotFollower
+from fatura_memo import LRUCache, memoize
+from fatura_perf import LatencyHistory, RunRecorder, configure_log, count_rows
+from fatura_refresh import Refresher
+from fatura_source import InvoiceFilter, open_source
 
 # Paleta de cores
 COLORS = {
@@ -26,9 +28,8 @@ COLORS = {
     "sidebar": "#253644"  # Nova cor adicionada para o sidebar
 }
 
-# Função para formatar números com ponto nos milhares e vírgula nos decimais
-def format_brl(value):
-    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+# Cores das faixas de atraso, na ordem de AGING_BUCKETS (a vencer, 0-30, 31-60, 61-90, >90)
+AGING_COLORS = ["#2E86AB", "#4ECDC4", "#FFD166", "#F79D65", "#FF6B6B"]
 
 # Estilos CSS personalizados
 def local_css():
@@ -99,179 +100,211 @@ def local_css():
     </style>
     """, unsafe_allow_html=True)
 
-local_css()
+# Caminho para as planilhas
+DATA_PATH = r"K:\RelatoriosFinanceiros\Rel_441\*.xlsx"  # Assumindo arquivos Excel
+
+# Origem dos dados: 'xlsx' (planilhas em DATA_PATH, mantidas em memória) ou
+# 'parquet', 'sqlite' e 'duckdb' (STORE_PATH, gerado com ``python fatura_source.py``),
+# em que filtros e somas são consultas e só a página visível vem para a memória
+DATA_SOURCE = 'xlsx'
+STORE_PATH = r"K:\RelatoriosFinanceiros\Rel_441\faturas.db"
+
+# Intervalo (em segundos) entre duas verificações da pasta em segundo plano
+REFRESH_INTERVAL = 60
+
+# Planilhas modificadas há menos segundos que isso são lidas só na verificação seguinte
+REFRESH_DEBOUNCE = 30
+
+# Engine de leitura das planilhas: 'calamine' (pacote python-calamine, bem mais
+# rápida) ou 'openpyxl'. Arquivos que a engine escolhida não consegue ler (ou
+# sem o pacote instalado) são lidos com openpyxl
+EXCEL_ENGINE = 'calamine'
+
+# Processos usados para ler as planilhas em paralelo (1 = leitura sequencial)
+PARSE_WORKERS = os.cpu_count() or 1
+
+# Máximo de clientes oferecidos de uma vez no filtro de clientes
+CLIENT_OPTIONS_LIMIT = 200
+
+# Opções de linhas por página da tabela de faturas
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Busca de faturas: 'substring' (texto em qualquer posição) ou 'prefix' (início do ID ou do cliente)
+SEARCH_MODE = 'substring'
+
+# Quantidade mínima de caracteres para a busca ser aplicada
+SEARCH_MIN_CHARS = 1
+
+# A partir de quantas linhas a exportação mostra uma barra de progresso
+EXPORT_PROGRESS_ROWS = 100_000
+
+# Tamanho dos caches de etapas (filtro, resumo, gráficos, busca) por sessão e no servidor
+SESSION_CACHE_SIZE = 32
+SHARED_CACHE_SIZE = 256
+
+# Pasta do cache colunar (Feather) da tabela normalizada, mantido entre reinícios
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fatura_dashboard")
+
+# Vários processos ou réplicas do servidor com a mesma CACHE_DIR: só um lê as
+# planilhas; os demais (FATURA_SNAPSHOT_FOLLOWER=1) abrem o snapshot gravado por
+# ele com memory-mapping e compartilham a mesma cópia da tabela na memória
+SNAPSHOT_FOLLOWER = os.environ.get("FATURA_SNAPSHOT_FOLLOWER") == "1"
+
+# Medição das etapas de cada execução: sempre (True) ou só com ?perf=1 na URL.
+# Os tempos aparecem no painel "Performance" e em PERF_LOG_FILE (uma linha JSON por execução)
+PERF_ENABLED = False
+PERF_LOG_FILE = os.path.join(CACHE_DIR, "perf.jsonl")
+
+# Carga progressiva: a página abre na hora e cartões e gráficos são completados conforme
+# as planilhas são lidas em segundo plano (False: a primeira execução espera a carga inteira)
+PROGRESSIVE_LOADING = True
+
+# Intervalo (s) entre as verificações do andamento da carga
+LOAD_POLL_INTERVAL = 1
+
+# Clientes exibidos na tabela de atraso (os de maior valor vencido)
+AGING_CLIENTS_LIMIT = 20
+
+# Agrupamento dos gráficos por período: conforme o tamanho do intervalo (Automático) ou fixo
+CHART_GROUPINGS = {'Automático': None, 'Dia': 'D', 'Mês': 'M', 'Ano': 'Y'}
+
+# Máximo de pontos no gráfico por período; acima disso (por exemplo, agrupado por dia num
+# intervalo de anos) os períodos são agrupados em blocos
+MAX_CHART_POINTS = 366
+
+# A partir de quantos pontos o gráfico por período usa linhas em WebGL (Scattergl) em vez
+# de barras (o Plotly não tem barras em WebGL)
+WEBGL_MIN_POINTS = 100
+
+# Carregador incremental e atualização em segundo plano, compartilhados entre as sessões
+@st.cache_resource
+def get_refresher():
+    if SNAPSHOT_FOLLOWER:
+        loader = SnapshotFollower(CACHE_DIR)
+    else:
+        loader = IncrementalLoader(
+            DATA_PATH,
+            workers=PARSE_WORKERS,
+            cache_dir=CACHE_DIR,
+            debounce=REFRESH_DEBOUNCE,
+            engine=EXCEL_ENGINE
+        )
+    refresher = Refresher(
+        loader, interval=REFRESH_INTERVAL, search_mode=SEARCH_MODE, progressive=PROGRESSIVE_LOADING
+    )
+    refresher.start()
+    return refresher
+
+# Origem dos dados configurada, compartilhada entre as sessões
+@st.cache_resource
+def get_source():
+    refresher = get_refresher() if DATA_SOURCE == 'xlsx' else None
+    return open_source(DATA_SOURCE, STORE_PATH, refresher=refresher, search_mode=SEARCH_MODE)
 
 # Função para carregar dados das planilhas
-@st.cache_data
 def load_data():
-    # Caminho para as planilhas
-    path = r"K:\RelatoriosFinanceiros\Rel_441\*.xlsx"  # Assumindo arquivos Excel
-    
-    all_files = glob.glob(path)
-    dfs = []
-    
-    for file in all_files:
-        try:
-            df = pd.read_excel(file)
-            # Padronizar nomes de colunas (caso haja variações)
-            df.columns = df.columns.str.upper()
-            dfs.append(df)
-        except Exception as e:
-            st.error(f"Erro ao ler o arquivo {file}: {e}")
-    
-    if not dfs:
+    source = get_source()
+    if PROGRESSIVE_LOADING:
+        # Não espera a carga: None até a primeira versão parcial (ver show_load_progress)
+        dataset = source.current(wait=False)
+        if dataset is None:
+            return None
+    elif not source.loaded:
+        with st.spinner("Carregando planilhas..."):
+            dataset = source.current()
+    else:
+        dataset = source.current()
+
+    for file, error in dataset.errors.items():
+        st.error(f"Erro ao ler o arquivo {file}: {error}")
+
+    unmapped = sorted({value for values in dataset.unmapped_status.values() for value in values})
+    if unmapped:
+        st.warning(
+            "Status não reconhecidos (considerados 'Em aberto'): " + ", ".join(unmapped)
+        )
+
+    if dataset.empty:
         st.error("Nenhuma planilha encontrada ou foi possível ler.")
-        return pd.DataFrame()
-    
-    # Concatenar todos os DataFrames
-    combined_df = pd.concat(dfs, ignore_index=True)
-    
-    # Renomear colunas conforme solicitado
-    combined_df = combined_df.rename(columns={
-        'FATURA': 'ID',
-        'CLIENTE': 'Cliente',
-        'VLR FATUR': 'Valor',
-        'VENCIMEN': 'Vencimento',
-        'LIQUIDADA/ATRASADA': 'Status'
-    })
-    
-    # Converter status para valores padronizados
-    combined_df['Status'] = combined_df['Status'].apply(
-        lambda x: 'Paga' if str(x).strip().upper() == 'LIQUIDADO' else 'Em aberto'
-    )
-    
-    # Converter datas se necessário
-    if 'Vencimento' in combined_df.columns:
-        combined_df['Vencimento'] = pd.to_datetime(combined_df['Vencimento'], errors='coerce')
-    
-    return combined_df.dropna(subset=['ID', 'Valor', 'Vencimento'])
-
-# Carregar dados
-df = load_data()
-
-if df.empty:
-    st.error("Não foi possível carregar os dados. Verifique os arquivos na pasta.")
-    st.stop()
-
-# Filtros
-st.sidebar.title("Filtros")
-
-# Seletor de intervalo de datas
-min_date = df['Vencimento'].min().date()
-max_date = df['Vencimento'].max().date()
-
-date_range = st.sidebar.date_input(
-    "Selecione o intervalo de datas:",
-    value=(min_date, max_date),
-    min_value=min_date,
-    max_value=max_date
-)
-
-# Verificar se selecionou um intervalo válido
-if len(date_range) == 2:
-    start_date, end_date = date_range
-else:
-    start_date, end_date = min_date, max_date
-
-# Outros filtros
-status_filter = st.sidebar.multiselect(
-    "Status", 
-    options=['Paga', 'Em aberto'], 
-    default=['Paga', 'Em aberto']
-)
-
-client_filter = st.sidebar.multiselect(
-    "Cliente", 
-    options=df['Cliente'].unique()
-)
-
-# Aplicar filtros
-filtered_df = df.copy()
-filtered_df = filtered_df[
-    (filtered_df['Vencimento'].dt.date >= start_date) & 
-    (filtered_df['Vencimento'].dt.date <= end_date)
-]
-
-if status_filter:
-    filtered_df = filtered_df[filtered_df['Status'].isin(status_filter)]
-if client_filter:
-    filtered_df = filtered_df[filtered_df['Cliente'].isin(client_filter)]
-
-# Cards de resumo
-st.title("📊 Dashboard de Faturas")
-
-# Linha do tempo interativa
-st.subheader(f"Período selecionado: {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}")
-
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.markdown(f"""
-    <div class="card">
-        <div class="card-title">Total de Faturas</div>
-        <div class="card-value">{len(filtered_df)}</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    unpaid = filtered_df[filtered_df['Status'] == 'Em aberto']['Valor'].sum()
-    st.markdown(f"""
-    <div class="card">
-        <div class="card-title">Valor em Aberto</div>
-        <div class="card-value">{format_brl(unpaid)}</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    paid = filtered_df[filtered_df['Status'] == 'Paga']['Valor'].sum()
-    st.markdown(f"""
-    <div class="card">
-        <div class="card-title">Valor Pago</div>
-        <div class="card-value">{format_brl(paid)}</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-with col4:
-    total_value = filtered_df['Valor'].sum()
-    st.markdown(f"""
-    <div class="card">
-        <div class="card-title">Valor Total</div>
-        <div class="card-value">{format_brl(total_value)}</div>
-    </div>
-    """, unsafe_allow_html=True)
+    return dataset
+
+# Tempos de leitura da última carga, das planilhas mais lentas para as mais rápidas
+def show_load_timings(report):
+    if report is None or not report.timings:
+        return
+    slowest = sorted(report.timings.items(), key=lambda item: item[1], reverse=True)
+    with st.sidebar.expander("Última carga"):
+        st.caption(f"{len(report.timings)} planilha(s) lida(s) em {report.seconds:.1f}s")
+        if report.memory_after:
+            st.caption(
+                f"Memória: {report.memory_before / 2**20:.1f} MB lidos, "
+                f"{report.memory_after / 2**20:.1f} MB após o esquema"
+            )
+        for file, seconds in slowest[:10]:
+            st.caption(f"{os.path.basename(file)}: {seconds:.2f}s")
+
+# Cache de etapas compartilhado entre as sessões
+@st.cache_resource
+def get_shared_cache():
+    return LRUCache(SHARED_CACHE_SIZE)
+
+# Duração das execuções de todas as sessões, para os percentis do painel
+@st.cache_resource
+def get_latency_history():
+    configure_log(PERF_LOG_FILE)
+    return LatencyHistory()
+
+# Painel com os tempos desta execução e os percentis das últimas execuções
+def show_performance(perf, history):
+    with st.sidebar.expander("Performance"):
+        st.caption(f"Execução: {perf.total * 1000:.0f} ms")
+        percentiles = history.percentiles()
+        if percentiles:
+            st.caption(
+                f"Últimas {len(history)} execuções: "
+                + ", ".join(f"p{percent} {seconds * 1000:.0f} ms" for percent, seconds in percentiles.items())
+            )
+        st.dataframe(
+            perf.frame(),
+            column_config={
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "Memória (MB)": st.column_config.NumberColumn(format="%.1f")
+            },
+            hide_index=True
+        )
+
+# Granularidade do gráfico de barras: a escolhida ou conforme o tamanho do intervalo
+def period_grouping(start_date, end_date, freq=None):
+    days = (end_date - start_date).days
+    if freq is None:
+        if days <= 31:  # Se intervalo menor que 1 mês, agrupar por dia
+            freq = 'D'
+        elif days <= 365:  # Se intervalo menor que 1 ano, agrupar por mês
+            freq = 'M'
+        else:  # Para intervalos maiores, agrupar por ano
+            freq = 'Y'
+    if freq == 'D':
+        # Em intervalos maiores que um mês o rótulo leva o ano, senão dias de anos diferentes se misturam
+        return 'D', '%d/%m' if days <= 31 else '%d/%m/%Y', 'Faturas por Dia'
+    if freq == 'M':
+        return 'M', '%m/%Y', 'Faturas por Mês'
+    return 'Y', '%Y', 'Faturas por Ano'
+
+# Gráfico de barras
+def build_bar_figure(period_summary, title):
+    import plotly.graph_objects as go
 
-# Gráficos
-st.markdown("---")
-col5, col6 = st.columns([6, 4])
-
-with col5:
-    # Agrupar por período selecionado
-    if (end_date - start_date).days <= 31:  # Se intervalo menor que 1 mês, agrupar por dia
-        filtered_df['Periodo'] = filtered_df['Vencimento'].dt.strftime('%d/%m')
-        title = 'Faturas por Dia'
-    elif (end_date - start_date).days <= 365:  # Se intervalo menor que 1 ano, agrupar por mês
-        filtered_df['Periodo'] = filtered_df['Vencimento'].dt.strftime('%m/%Y')
-        title = 'Faturas por Mês'
-    else:  # Para intervalos maiores, agrupar por ano
-        filtered_df['Periodo'] = filtered_df['Vencimento'].dt.strftime('%Y')
-        title = 'Faturas por Ano'
-    
-    # Gráfico de barras
-    period_summary = filtered_df.groupby(['Periodo', 'Status'])['Valor'].sum().unstack().fillna(0)
-    
     fig_bar = go.Figure()
-    fig_bar.add_trace(go.Bar(
-        x=period_summary.index,
-        y=period_summary['Paga'],
-        name='Pagas',
-        marker_color=COLORS['paid']
-    ))
-    fig_bar.add_trace(go.Bar(
-        x=period_summary.index,
-        y=period_summary['Em aberto'],
-        name='Em aberto',
-        marker_color=COLORS['unpaid']
-    ))
+    for status, name, color in (('Paga', 'Pagas', COLORS['paid']), ('Em aberto', 'Em aberto', COLORS['unpaid'])):
+        if len(period_summary) >= WEBGL_MIN_POINTS:
+            trace = go.Scattergl(mode='lines', line_color=color)
+        else:
+            trace = go.Bar(marker_color=color)
+        fig_bar.add_trace(trace.update(
+            x=period_summary.index.to_numpy(),
+            y=period_summary[status].to_numpy(),
+            name=name
+        ))
     
     fig_bar.update_layout(
         title=title,
@@ -283,15 +316,15 @@ with col5:
         xaxis_title="Período",
         yaxis_title="Valor (R$)"
     )
-    
-    st.plotly_chart(fig_bar, use_container_width=True)
+    return fig_bar
+
+# Gráfico de pizza
+def build_pie_figure(summary):
+    import plotly.graph_objects as go
 
-with col6:
-    # Gráfico de pizza
-    status_counts = filtered_df['Status'].value_counts()
     fig_pie = go.Figure(go.Pie(
-        labels=status_counts.index,
-        values=status_counts.values,
+        labels=summary.statuses,
+        values=summary.counts,
         hole=.4,
         marker_colors=[COLORS['paid'], COLORS['unpaid']],
         textinfo='percent+value'
@@ -304,60 +337,388 @@ with col6:
         font_color=COLORS['text'],
         showlegend=True
     )
-    
-    st.plotly_chart(fig_pie, use_container_width=True)
-
-# Tabela de faturas recentes
-st.markdown("---")
-
-# Cria duas colunas para o título e o campo de busca
-col_title, col_search = st.columns([4, 2])
-
-with col_title:
-    st.subheader(f"Faturas ({len(filtered_df)} no total)")
-
-with col_search:
-    # Adiciona um campo de texto para filtrar
-    search_term = st.text_input("Filtrar faturas:", placeholder="Digite ID, Cliente, Valor...", label_visibility="collapsed")
-
-# Aplica o filtro de texto se algo foi digitado
-if search_term:
-    search_lower = search_term.lower()
-    filtered_df = filtered_df[
-        filtered_df['ID'].astype(str).str.lower().str.contains(search_lower) |
-        filtered_df['Cliente'].astype(str).str.lower().str.contains(search_lower) |
-        filtered_df['Valor'].astype(str).str.lower().str.contains(search_lower) |
-        filtered_df['Vencimento'].astype(str).str.lower().str.contains(search_lower) |
-        filtered_df['Status'].astype(str).str.lower().str.contains(search_lower)
-    ]
-
-# Adicionar ícones de status
-def status_icon(status):
-    return "✅" if status == "Paga" else "⚠️"
-
-display_df = filtered_df.copy()
-display_df['Status'] = display_df['Status'].apply(status_icon)
-display_df = display_df.sort_values('Vencimento', ascending=False)
-
-# Formatar a coluna Valor na tabela
-display_df['Valor'] = display_df['Valor'].apply(lambda x: format_brl(x))
-
-st.dataframe(
-    display_df[['ID', 'Cliente', 'Valor', 'Vencimento', 'Status']],
-    column_config={
-        "Vencimento": st.column_config.DateColumn(format="DD/MM/YYYY")
-    },
-    use_container_width=True,
-    height=400
-)
-
-# Botão de exportação
-st.sidebar.markdown("---")
-if st.sidebar.button("Exportar para CSV"):
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
-    st.sidebar.download_button(
-        label="Baixar CSV",
-        data=csv,
-        file_name="faturas.csv",
-        mime="text/csv"
+    return fig_pie
+
+# Gráfico de atraso: valor em aberto por período de vencimento, empilhado por faixa
+def build_aging_figure(by_period, title):
+    import plotly.graph_objects as go
+
+    fig_aging = go.Figure()
+    for bucket, color in zip(AGING_BUCKETS, AGING_COLORS):
+        fig_aging.add_trace(go.Bar(
+            x=by_period.index.to_numpy(),
+            y=by_period[bucket].to_numpy(),
+            name=bucket,
+            marker_color=color
+        ))
+
+    fig_aging.update_layout(
+        title=title,
+        plot_bgcolor=COLORS['secondary'],
+        paper_bgcolor=COLORS['secondary'],
+        font_color=COLORS['text'],
+        barmode='stack',
+        hovermode="x unified",
+        xaxis_title="Vencimento",
+        yaxis_title="Valor em aberto (R$)"
+    )
+    return fig_aging
+
+def period_chart(dataset, filters, freq):
+    freq, period_format, title = period_grouping(filters.start_date, filters.end_date, freq)
+    period_summary = dataset.period_summary(filters, freq)
+    period_summary.index = period_summary.index.strftime(period_format)
+    return build_bar_figure(downsample(period_summary, MAX_CHART_POINTS), title)
+
+def aging_chart(aging, period_format, title):
+    # O resumo vem do cache de etapas: os rótulos vão numa cópia
+    by_period = aging.by_period.set_axis(aging.by_period.index.strftime(period_format))
+    return build_aging_figure(downsample(by_period, MAX_CHART_POINTS), title)
+
+# Página do dashboard. Só roda como script do Streamlit (__main__): os processos de
+# leitura das planilhas (spawn) importam este arquivo como __mp_main__ e não podem
+# refazer a página nem abrir outro pool
+def main():
+    # Configuração da página
+    st.set_page_config(
+        page_title="Dashboard de Faturas",
+        page_icon="💳",
+        layout="wide"
+    )
+
+    # Estilos
+    local_css()
+
+    # Medição das etapas desta execução (ligada por PERF_ENABLED ou ?perf=1)
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex[:8])
+    perf = RunRecorder(PERF_ENABLED or st.query_params.get("perf") == "1", session=session_id)
+
+    # Carregar dados (a mesma versão é usada do início ao fim da execução)
+    with perf.stage("load") as timing:
+        dataset = load_data()
+        timing.rows_out = dataset.size if dataset is not None and not dataset.empty else 0
+
+    # Executa uma etapa do pipeline só se o resultado não estiver em cache. A chave
+    # inclui a versão dos dados, então uma nova carga invalida tudo automaticamente.
+    def stage(name, key, compute):
+        session_cache = st.session_state.setdefault("stage_cache", LRUCache(SESSION_CACHE_SIZE))
+        computed = []
+
+        def run():
+            computed.append(True)
+            return compute()
+
+        with perf.stage(name, rows_in=dataset.size) as timing:
+            result = memoize([session_cache, get_shared_cache()], (name, dataset.version) + key, run)
+            timing.rows_out = count_rows(result)
+            timing.cached = not computed
+        return result
+
+    # Carga em andamento (primeira carga ou versão parcial): a página é refeita a cada versão nova
+    loading = get_source().loading
+
+    @st.fragment(run_every=LOAD_POLL_INTERVAL if loading else None)
+    def show_load_progress():
+        if not loading:
+            return
+        source = get_source()
+        current = source.current(wait=False)
+        if current is not None and (current is not dataset or not source.loading):
+            st.rerun()
+        progress = source.progress
+        if progress is not None and progress.total:
+            st.progress(
+                progress.fraction,
+                text=f"Carregando planilhas: {progress.done} de {progress.total} lidas..."
+            )
+        else:
+            st.caption("Verificando planilhas...")
+
+    if dataset is None:
+        # Nada lido ainda: só a estrutura da página e o andamento da carga
+        st.sidebar.title("Filtros")
+        st.sidebar.caption("Carregando planilhas...")
+        st.title("📊 Dashboard de Faturas")
+        show_load_progress()
+        st.stop()
+
+    if dataset.empty:
+        st.error("Não foi possível carregar os dados. Verifique os arquivos na pasta.")
+        st.stop()
+
+    # Filtros
+    st.sidebar.title("Filtros")
+    st.sidebar.caption(f"Dados de {dataset.as_of.strftime('%d/%m/%Y %H:%M')}")
+    show_load_timings(dataset.report)
+
+    # Seletor de intervalo de datas
+    min_date, max_date = dataset.date_range()
+
+    date_range = st.sidebar.date_input(
+        "Selecione o intervalo de datas:",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date
+    )
+
+    # Verificar se selecionou um intervalo válido
+    if len(date_range) == 2:
+        start_date, end_date = date_range
+    else:
+        start_date, end_date = min_date, max_date
+
+    chart_grouping = st.sidebar.selectbox("Agrupar gráficos por", list(CHART_GROUPINGS))
+    chart_freq = CHART_GROUPINGS[chart_grouping]
+
+    # Outros filtros
+    status_filter = st.sidebar.multiselect(
+        "Status", 
+        options=['Paga', 'Em aberto'], 
+        default=['Paga', 'Em aberto']
+    )
+
+    # Só os clientes que começam com o texto buscado são enviados ao navegador
+    client_query = st.sidebar.text_input("Buscar cliente", placeholder="Digite o início do nome...")
+    client_options, client_matches = dataset.search_clients(client_query, CLIENT_OPTIONS_LIMIT)
+    selected_clients = st.session_state.get("client_filter", [])
+
+    client_filter = st.sidebar.multiselect(
+        "Cliente", 
+        options=list(dict.fromkeys(selected_clients + client_options)),
+        key="client_filter"
+    )
+    if client_matches > len(client_options):
+        st.sidebar.caption(f"Mostrando {len(client_options)} de {client_matches} clientes. Digite para refinar.")
+
+    # Aplicar filtros (cada etapa é refeita só quando a sua chave muda)
+    filters = InvoiceFilter(start_date, end_date, tuple(sorted(status_filter)), tuple(sorted(client_filter)))
+    filter_key = (filters,)
+
+    # Cards de resumo
+    st.title("📊 Dashboard de Faturas")
+    show_load_progress()
+
+    # Linha do tempo interativa
+    st.subheader(f"Período selecionado: {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}")
+
+    # Cartões e gráfico de pizza usam o mesmo resumo por status, calculado a partir do cubo
+    summary = stage("summary", filter_key, lambda: dataset.summary(filters))
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.markdown(f"""
+        <div class="card">
+            <div class="card-title">Total de Faturas</div>
+            <div class="card-value">{summary.count}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        unpaid = summary.value_of('Em aberto')
+        st.markdown(f"""
+        <div class="card">
+            <div class="card-title">Valor em Aberto</div>
+            <div class="card-value">{format_brl(unpaid)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3:
+        paid = summary.value_of('Paga')
+        st.markdown(f"""
+        <div class="card">
+            <div class="card-title">Valor Pago</div>
+            <div class="card-value">{format_brl(paid)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col4:
+        total_value = summary.total
+        st.markdown(f"""
+        <div class="card">
+            <div class="card-title">Valor Total</div>
+            <div class="card-value">{format_brl(total_value)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Gráficos
+    st.markdown("---")
+    col5, col6 = st.columns([6, 4])
+
+    with col5:
+        fig_bar = stage("fig_bar", filter_key + (chart_freq,), lambda: period_chart(dataset, filters, chart_freq))
+        with perf.stage("render_fig_bar"):
+            st.plotly_chart(fig_bar, use_container_width=True)
+
+    with col6:
+        fig_pie = stage("fig_pie", filter_key, lambda: build_pie_figure(summary))
+        with perf.stage("render_fig_pie"):
+            st.plotly_chart(fig_pie, use_container_width=True)
+
+    # Atraso das faturas em aberto (aging), por faixa, período de vencimento e cliente
+    st.markdown("---")
+    col_aging_title, col_aging_date = st.columns([4, 2])
+
+    with col_aging_title:
+        st.subheader("Atraso das faturas em aberto")
+
+    with col_aging_date:
+        aging_reference = st.date_input("Data de referência", value=date.today(), format="DD/MM/YYYY")
+
+    aging_freq, aging_format, _ = period_grouping(start_date, end_date, chart_freq)
+    aging_key = filter_key + (aging_reference, aging_freq)
+    aging = stage("aging", aging_key, lambda: dataset.aging(filters, aging_reference, aging_freq))
+
+    if aging.count == 0:
+        st.info("Nenhuma fatura em aberto nos filtros selecionados.")
+    else:
+        for column, bucket, count, value in zip(st.columns(len(AGING_BUCKETS)), AGING_BUCKETS, aging.counts, aging.values):
+            label = bucket if bucket == AGING_BUCKETS[0] else f"{bucket} dias"
+            with column:
+                st.markdown(f"""
+                <div class="card">
+                    <div class="card-title">{label} ({count} faturas)</div>
+                    <div class="card-value">{format_brl(value)}</div>
+                </div>
+                """, unsafe_allow_html=True)
+
+        col7, col8 = st.columns([6, 4])
+
+        with col7:
+            fig_aging = stage(
+                "fig_aging", aging_key,
+                lambda: aging_chart(aging, aging_format, "Valor em aberto por vencimento e faixa de atraso")
+            )
+            with perf.stage("render_fig_aging"):
+                st.plotly_chart(fig_aging, use_container_width=True)
+
+        with col8:
+            by_client = aging.by_client
+            st.caption(
+                f"Clientes com maior valor vencido ({min(len(by_client), AGING_CLIENTS_LIMIT)} de {len(by_client)})"
+            )
+            # Valores em reais como na tabela de faturas: texto de format_brl, colunas numéricas
+            st.dataframe(
+                by_client.head(AGING_CLIENTS_LIMIT).rename_axis(columns=None).reset_index()
+                .style.format({bucket: format_brl for bucket in AGING_BUCKETS}),
+                column_config={bucket: st.column_config.NumberColumn(bucket) for bucket in AGING_BUCKETS},
+                use_container_width=True,
+                hide_index=True
+            )
+
+    # Tabela de faturas recentes
+    st.markdown("---")
+
+    # Cria duas colunas para o título e o campo de busca
+    col_title, col_search = st.columns([4, 2])
+
+    with col_title:
+        st.subheader(f"Faturas ({stage('count', filter_key, lambda: dataset.count(filters))} no total)")
+
+    with col_search:
+        # Adiciona um campo de texto para filtrar
+        search_term = st.text_input("Filtrar faturas:", placeholder="Digite ID, Cliente, Valor...", label_visibility="collapsed")
+
+    # Aplica o filtro de texto se algo foi digitado
+    # Só esta etapa depende do texto buscado: filtros, cartões e gráficos vêm do cache
+    table_filters = filters
+    if len(search_term.strip()) >= SEARCH_MIN_CHARS:
+        table_filters = dataclasses.replace(filters, search=search_term.strip().lower())
+    table_key = (table_filters,)
+    table_count = stage("count", table_key, lambda: dataset.count(table_filters))
+
+    # Paginação: só a página visível é montada e enviada ao navegador
+    table_state = table_filters
+    if st.session_state.get("table_state") != table_state:
+        st.session_state["table_state"] = table_state
+        st.session_state["page"] = 1
+
+    col_size, col_page, col_info = st.columns([1, 1, 4])
+    with col_size:
+        page_size = st.selectbox("Linhas por página", PAGE_SIZES, key="page_size")
+    page_count = max(1, -(-table_count // page_size))
+    st.session_state["page"] = min(st.session_state.get("page", 1), page_count)
+    with col_page:
+        page = st.number_input("Página", min_value=1, max_value=page_count, step=1, key="page")
+    with col_info:
+        st.caption(f"Página {page} de {page_count}")
+
+    # Mais recentes primeiro
+    page_df = stage("page", table_key + (page, page_size), lambda: dataset.page(table_filters, page - 1, page_size))
+
+    # Adicionar ícones de status (troca só as categorias)
+    display_df = page_df[['ID', 'Cliente', 'Valor', 'Vencimento', 'Status']].assign(
+        Status=status_icons(page_df['Status'])
     )
+
+    # Valor continua numérico (a grade ordena pelos números); só o texto exibido vem de
+    # format_brl, aplicado às linhas da página. Sem ``format`` na coluna, a grade usa
+    # esse texto em vez do formato do navegador
+    with perf.stage("render_table", rows_in=len(display_df)):
+        st.dataframe(
+            display_df.style.format({'Valor': format_brl}),
+            column_config={
+                "Valor": st.column_config.NumberColumn("Valor"),
+                "Vencimento": st.column_config.DateColumn(format="DD/MM/YYYY")
+            },
+            use_container_width=True,
+            hide_index=True,
+            height=400
+        )
+
+    # Botão de exportação
+    st.sidebar.markdown("---")
+    export_format = st.sidebar.selectbox("Formato de exportação", list(EXPORT_FORMATS))
+    export_extension, export_mime = EXPORT_FORMATS[export_format]
+    export_progress = st.session_state.setdefault("export_progress", ExportProgress())
+
+    # Gerado só no clique, em blocos, numa thread separada da execução do script; cada linha
+    # leva os dias e a faixa de atraso na data de referência do painel de atraso
+    def build_export(filters=table_filters, export_format=export_format, reference=aging_reference):
+        export_perf = RunRecorder(perf.enabled, session=session_id, event="export")
+        with export_perf.stage(f"export_{export_format}", rows_in=dataset.size) as timing:
+            data = dataset.export(filters, export_format, progress=export_progress, reference=reference)
+            timing.rows_out = export_progress.written
+        export_perf.log()
+        return data
+
+    clicked = st.sidebar.download_button(
+        label=f"Exportar para {export_format}",
+        data=build_export,
+        file_name=f"faturas.{export_extension}",
+        mime=export_mime
+    )
+
+    # Andamento de exportações grandes, atualizado enquanto o arquivo é gerado. A execução
+    # do clique pode vir antes de a geração começar: acompanha a partir dela também
+    polling = export_progress.running or clicked
+
+    @st.fragment(run_every=1 if polling else None)
+    def show_export_progress():
+        if export_progress.running:
+            if export_progress.total >= EXPORT_PROGRESS_ROWS:
+                st.progress(
+                    export_progress.fraction,
+                    text=f"Exportando {export_progress.written} de {export_progress.total} faturas..."
+                )
+        elif st.session_state.get("export_polling"):
+            # Exportação terminou: nova execução para parar a atualização periódica
+            st.session_state["export_polling"] = False
+            st.rerun()
+        if export_progress.error:
+            st.error(f"Erro ao exportar: {export_progress.error}")
+        st.session_state["export_polling"] = polling
+
+    with st.sidebar:
+        show_export_progress()
+
+    # Tempos desta execução: painel lateral e log JSON
+    if perf.enabled:
+        history = get_latency_history()
+        history.add(perf.total)
+        show_performance(perf, history)
+        perf.log()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Exportação das faturas filtradas em CSV, Excel ou Parquet.
+
+As linhas são gravadas em blocos num arquivo temporário (em memória até
+SPOOL_MAX_BYTES, depois em disco), sem montar o arquivo inteiro como string.
+O resultado é devolvido em bytes, o tipo que o ``st.download_button`` aceita
+de uma função; o Streamlit guarda o arquivo na memória de qualquer forma.
+Com uma data de referência, cada linha leva também os dias em atraso e a
+faixa de atraso (ver fatura_aging).
+"""
+import io
+import tempfile
+
+import numpy as np
+
+from fatura_aging import AGING_COLUMNS, BUCKET_COLUMN, DAYS_COLUMN, add_aging_columns
+from fatura_query import row_count
+
+# Colunas exportadas, na ordem da tabela do dashboard
+EXPORT_COLUMNS = ['ID', 'Cliente', 'Valor', 'Vencimento', 'Status']
+
+# Formato -> (extensão, MIME)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet')
+}
+
+# Linhas gravadas por bloco
+CHUNK_ROWS = 50_000
+
+# Acima deste tamanho o arquivo temporário sai da memória e vai para o disco
+SPOOL_MAX_BYTES = 32 * 2**20
+
+# Formatos de célula do Excel
+XLSX_BRL_FORMAT = '"R$" #,##0.00'
+XLSX_DATE_FORMAT = 'DD/MM/YYYY'
+
+
+class ExportProgress:
+    """Andamento de uma exportação, atualizado pela thread que gera o arquivo."""
+
+    def __init__(self):
+        self.total = 0
+        self.written = 0
+        self.running = False
+        self.error = None
+
+    def start(self, total):
+        self.total = total
+        self.written = 0
+        self.running = True
+        self.error = None
+
+    @property
+    def fraction(self):
+        return self.written / self.total if self.total else 0.0
+
+
+def iter_chunks(df, rows, chunk_rows=CHUNK_ROWS):
+    # Blocos das colunas exportadas, na ordem das posições em ``rows``
+    if isinstance(rows, slice):
+        rows = np.arange(rows.start, rows.stop)
+    for first in range(0, len(rows), chunk_rows):
+        yield df.iloc[rows[first:first + chunk_rows]][EXPORT_COLUMNS]
+
+
+def _write_csv(chunks, out, advance, columns):
+    # Padrão do Excel em português: ';' entre colunas, vírgula decimal e BOM UTF-8
+    text = io.TextIOWrapper(out, encoding='utf-8-sig', newline='')
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(
+            text, sep=';', decimal=',', float_format='%.2f', date_format='%d/%m/%Y', index=False, header=header
+        )
+        header = False
+        advance(len(chunk))
+    text.flush()
+    text.detach()
+
+
+def _write_xlsx(chunks, out, advance, columns):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Faturas')
+    sheet.append(columns)
+    extra = columns[len(EXPORT_COLUMNS):]
+    for chunk in chunks:
+        clientes = chunk['Cliente'].astype(object).where(chunk['Cliente'].notna(), None)
+        datas = chunk['Vencimento'].dt.to_pydatetime()
+        # Colunas além das da tabela (aging): células vazias no lugar de NA
+        extras = [chunk[column].astype(object).where(chunk[column].notna(), None) for column in extra]
+        for id_, cliente, valor, data, status, *rest in zip(
+            chunk['ID'], clientes, chunk['Valor'], datas, chunk['Status'], *extras
+        ):
+            valor_cell = WriteOnlyCell(sheet, value=float(valor))
+            valor_cell.number_format = XLSX_BRL_FORMAT
+            data_cell = WriteOnlyCell(sheet, value=data)
+            data_cell.number_format = XLSX_DATE_FORMAT
+            sheet.append([id_, cliente, valor_cell, data_cell, status, *rest])
+        advance(len(chunk))
+    workbook.save(out)
+
+
+def _write_parquet(chunks, out, advance, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        'ID': pa.string(),
+        'Cliente': pa.string(),
+        'Valor': pa.float64(),
+        'Vencimento': pa.timestamp('ns'),
+        'Status': pa.string(),
+        DAYS_COLUMN: pa.int64(),
+        BUCKET_COLUMN: pa.string()
+    }
+    schema = pa.schema([(column, types[column]) for column in columns])
+    strings = {column: 'string' for column in ('Cliente', 'Status', BUCKET_COLUMN) if column in columns}
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            chunk = chunk.astype(strings)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            advance(len(chunk))
+
+
+WRITERS = {'CSV': _write_csv, 'Excel': _write_xlsx, 'Parquet': _write_parquet}
+
+
+def export_chunks(chunks, total, export_format, progress=None, reference=None):
+    """Grava os blocos ``chunks`` (``total`` linhas) e devolve o conteúdo do arquivo (bytes).
+
+    Com ``reference`` (data), acrescenta as colunas de aging calculadas nessa data.
+    """
+    columns = EXPORT_COLUMNS
+    if reference is not None:
+        columns = EXPORT_COLUMNS + AGING_COLUMNS
+        chunks = (add_aging_columns(chunk, reference) for chunk in chunks)
+    # Começa aqui, na thread que gera o arquivo, e não no clique: assim ``running``
+    # nunca fica ligado depois de a exportação terminar
+    progress = progress or ExportProgress()
+    progress.start(total)
+
+    def advance(count):
+        progress.written += count
+
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as out:
+            WRITERS[export_format](chunks, out, advance, columns)
+            out.seek(0)
+            return out.read()
+    except Exception as e:
+        progress.error = str(e)
+        raise
+    finally:
+        progress.running = False
+
+
+def export_rows(df, rows, export_format, progress=None, reference=None):
+    """Grava as linhas ``rows`` (slice ou posições) e devolve o conteúdo do arquivo (bytes)."""
+    return export_chunks(iter_chunks(df, rows), row_count(rows), export_format, progress, reference)
@@ -0,0 +1,73 @@
+"""Formatação de valores para exibição e exportação."""
+import numpy as np
+import pandas as pd
+
+# Ícones exibidos na coluna Status da tabela
+STATUS_ICONS = {'Paga': "✅", 'Em aberto': "⚠️"}
+
+# Distância de meio centavo (em centavos) abaixo da qual o arredondamento
+# vetorizado é conferido com a formatação do Python
+HALF_CENT_TOLERANCE = 1e-6
+
+
+# Função para formatar números com ponto nos milhares e vírgula nos decimais
+def format_brl(value):
+    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _brl_texts(values):
+    # Formatação em bloco com pyarrow.compute; sem pyarrow, usa format_brl valor a valor
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return np.array([format_brl(value) for value in values], dtype=object)
+
+    absolute = np.abs(values)
+    # Parte inteira e centavos separados: a fração é exata, só a multiplicação por
+    # 100 arredonda. Perto de meio centavo esse arredondamento pode decidir para o
+    # lado errado; esses poucos valores são arredondados como em format_brl
+    integer = np.floor(absolute).astype(np.int64)
+    scaled = (absolute - integer) * 100
+    cents = np.rint(scaled).astype(np.int64)
+    for position in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < HALF_CENT_TOLERANCE):
+        whole, fraction = f"{absolute[position]:.2f}".split('.')
+        integer[position], cents[position] = int(whole), int(fraction)
+    integer += cents // 100
+    cents %= 100
+
+    def digits(numbers, width):
+        return pc.utf8_lpad(pc.cast(pa.array(numbers), pa.string()), width, '0')
+
+    # Grupos de 3 dígitos separados por ponto; depois saem os zeros à esquerda
+    groups = (len(str(integer.max())) + 2) // 3 if len(integer) else 1
+    text = digits(integer % 1000, 3)
+    for power in range(1, groups):
+        text = pc.binary_join_element_wise(digits(integer // 1000 ** power % 1000, 3), text, '.')
+    text = pc.utf8_ltrim(text, '0.')
+    text = pc.if_else(pc.equal(text, ''), '0', text)
+
+    prefix = pc.if_else(pa.array(np.signbit(values)), 'R$ -', 'R$ ')
+    formatted = pc.binary_join_element_wise(prefix, text, ',', digits(cents, 2), '')
+    return formatted.to_numpy(zero_copy_only=False)
+
+
+def format_brl_array(values):
+    """Versão vetorizada de ``format_brl`` para uma coluna inteira.
+
+    Só os valores distintos são formatados; o resultado é expandido para as
+    linhas pelos códigos do ``factorize``. Valores ausentes viram texto vazio.
+    """
+    values = pd.Series(values, dtype='float64')
+    codes, uniques = pd.factorize(values)
+    formatted = np.append(_brl_texts(np.asarray(uniques)), '')
+    return pd.Series(formatted[codes], index=values.index, dtype='string')
+
+
+def status_icon(status):
+    return STATUS_ICONS.get(status, "⚠️")
+
+
+def status_icons(status):
+    # Troca só as categorias, sem percorrer as linhas
+    return status.cat.rename_categories(status_icon)
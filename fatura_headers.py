@@ -0,0 +1,74 @@
+"""Localização do cabeçalho e mapeamento das colunas das planilhas do Rel_441.
+
+O cabeçalho é procurado só nas primeiras linhas da planilha (pode haver
+linhas de título acima dele). Os nomes das colunas são comparados sem
+acentos, sem diferença entre maiúsculas e minúsculas e com espaços e
+pontuação padronizados, contra uma lista de apelidos de cada coluna.
+"""
+import re
+import unicodedata
+
+# Coluna do dashboard -> nomes aceitos na planilha (o primeiro é o do Rel_441)
+COLUMN_ALIASES = {
+    'ID': ['FATURA', 'Nº FATURA', 'N° FATURA', 'NUM FATURA', 'NUMERO FATURA', 'NR FATURA', 'ID'],
+    'Cliente': ['CLIENTE', 'NOME CLIENTE', 'NOME DO CLIENTE', 'RAZAO SOCIAL'],
+    'Valor': ['VLR FATUR', 'VLR FATURA', 'VALOR FATURA', 'VALOR', 'VLR'],
+    'Vencimento': ['VENCIMEN', 'VENCIMENTO', 'DT VENCIMENTO', 'DATA VENCIMENTO', 'DT VENC'],
+    'Status': ['LIQUIDADA/ATRASADA', 'LIQUIDADO/ATRASADO', 'STATUS', 'SITUACAO']
+}
+
+# Linhas lidas do início da planilha para encontrar o cabeçalho
+HEADER_SCAN_ROWS = 20
+
+# Tipos usados na leitura; Valor e Vencimento são convertidos depois (ver fatura_schema)
+READ_DTYPES = {'ID': str, 'Cliente': str, 'Status': str}
+
+
+class HeaderError(ValueError):
+    """A planilha não tem um cabeçalho com todas as colunas do dashboard."""
+
+
+def normalize_header(name):
+    """'  Vlr. Fatur ' -> 'VLR FATUR'; 'Situação' -> 'SITUACAO'."""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^0-9A-Z]+', ' ', text.upper()).split())
+
+
+_ALIASES = {
+    normalize_header(alias): column
+    for column, aliases in COLUMN_ALIASES.items()
+    for alias in aliases
+}
+
+
+def match_columns(names):
+    """Posição -> coluna do dashboard, para os nomes reconhecidos (a primeira ocorrência vence)."""
+    matches = {}
+    for position, name in enumerate(names):
+        column = _ALIASES.get(normalize_header(name)) if isinstance(name, str) else None
+        if column is not None and column not in matches.values():
+            matches[position] = column
+    return matches
+
+
+def find_header(rows):
+    """Localiza o cabeçalho entre as primeiras linhas (lista de listas de células).
+
+    Devolve ``(linha, {posição: coluna})`` da primeira linha que tem todas as
+    colunas de COLUMN_ALIASES. Se nenhuma tiver, levanta ``HeaderError`` com as
+    colunas que faltaram na linha mais parecida com um cabeçalho.
+    """
+    best_row, best = 0, {}
+    for row, cells in enumerate(rows):
+        matches = match_columns(cells)
+        if len(matches) == len(COLUMN_ALIASES):
+            return row, matches
+        if len(matches) > len(best):
+            best_row, best = row, matches
+    missing = [column for column in COLUMN_ALIASES if column not in best.values()]
+    aliases = '; '.join(f"{column}: {', '.join(COLUMN_ALIASES[column])}" for column in missing)
+    raise HeaderError(
+        f"Cabeçalho não encontrado nas primeiras {HEADER_SCAN_ROWS} linhas "
+        f"(melhor candidata: linha {best_row + 1}). Colunas ausentes -> {aliases}"
+    )
@@ -0,0 +1,479 @@
+"""Ingestão incremental das planilhas do Rel_441.
+
+Mantém um manifesto com caminho, tamanho, mtime e hash do conteúdo de cada
+planilha já lida. A cada atualização só as planilhas novas ou alteradas são
+lidas de novo; as linhas de arquivos removidos são descartadas e o resultado
+é mesclado na tabela combinada de faturas.
+"""
+import glob
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+
+import pandas as pd
+
+from fatura_headers import HEADER_SCAN_ROWS, READ_DTYPES, HeaderError, find_header, match_columns
+from fatura_schema import (
+    COLUMNS,
+    SCHEMA_VERSION,
+    apply_schema,
+    concat_frames,
+    memory_usage,
+    normalize_status
+)
+from fatura_snapshot import latest_stamp, load_snapshot, manifest_key, read_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Coluna interna com o arquivo de origem de cada linha
+SOURCE_COLUMN = '_arquivo'
+
+# Engine de leitura -> módulo que precisa estar instalado
+EXCEL_ENGINES = {'calamine': 'python_calamine', 'openpyxl': 'openpyxl'}
+
+# Engine usada quando a escolhida falha num arquivo ou não está instalada
+FALLBACK_ENGINE = 'openpyxl'
+
+# Os processos de leitura começam do zero: um fork do servidor do Streamlit,
+# que tem várias threads, pode herdar locks travados e ficar parado
+POOL_START_METHOD = 'spawn'
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    path: str
+    size: int
+    mtime: float
+    sha1: str
+
+
+@dataclass
+class ParseResult:
+    path: str
+    frame: object = None
+    error: str = None
+    seconds: float = 0.0
+    memory_before: int = 0
+    memory_after: int = 0
+    unmapped_status: list = field(default_factory=list)
+    engine: str = None
+
+
+class LoadProgress:
+    """Andamento da leitura das planilhas, atualizado pela thread que carrega."""
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.running = False
+
+    def start(self, total):
+        self.total = total
+        self.done = 0
+        self.running = total > 0
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 0.0
+
+
+@dataclass
+class IngestReport:
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    # Memória das planilhas lidas antes e depois de aplicar o esquema (bytes)
+    memory_before: int = 0
+    memory_after: int = 0
+
+    @property
+    def modified(self):
+        return bool(self.added or self.changed or self.removed)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    # Hash do conteúdo, lido em blocos para não carregar o arquivo inteiro
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_frame(df, path, status_map=None):
+    """Devolve a planilha normalizada e os valores de status não mapeados."""
+    # Padronizar nomes de colunas (acentos, espaços e apelidos, ver fatura_headers)
+    names = {df.columns[position]: column for position, column in match_columns(df.columns).items()}
+    df = df.rename(columns=names).reindex(columns=COLUMNS)
+
+    # Converter status para valores padronizados
+    df['Status'], unmapped = normalize_status(df['Status'], status_map)
+
+    df = apply_schema(df).dropna(subset=['ID', 'Valor', 'Vencimento'])
+    df[SOURCE_COLUMN] = pd.Categorical([path] * len(df))
+    return df, unmapped
+
+
+def engine_available(engine):
+    return importlib.util.find_spec(EXCEL_ENGINES[engine]) is not None
+
+
+def read_report(path, engine=FALLBACK_ENGINE):
+    """Lê só as colunas do dashboard, a partir do cabeçalho encontrado nas primeiras linhas."""
+    with pd.ExcelFile(path, engine=engine) as workbook:
+        top = workbook.parse(header=None, nrows=HEADER_SCAN_ROWS)
+        header, matches = find_header(top.itertuples(index=False, name=None))
+        positions = sorted(matches)
+        names = [matches[position] for position in positions]
+        return workbook.parse(
+            header=None,
+            skiprows=header + 1,
+            usecols=positions,
+            names=names,
+            dtype={name: READ_DTYPES[name] for name in names if name in READ_DTYPES}
+        )
+
+
+def read_with_fallback(path, engine=FALLBACK_ENGINE):
+    """Lê com ``engine`` e, se ela falhar no arquivo, com FALLBACK_ENGINE.
+
+    Devolve ``(tabela, engine usada)``. Erros de cabeçalho não dependem da
+    engine e são propagados sem nova tentativa.
+    """
+    if engine != FALLBACK_ENGINE and engine_available(engine):
+        try:
+            return read_report(path, engine), engine
+        except HeaderError:
+            raise
+        except Exception as e:
+            logger.info("Falha ao ler %s com %s (%s); usando %s", path, engine, e, FALLBACK_ENGINE)
+    return read_report(path, FALLBACK_ENGINE), FALLBACK_ENGINE
+
+
+def parse_report(path, status_map=None, engine=FALLBACK_ENGINE):
+    # Executado nos processos do pool: nunca propaga exceções, devolve o erro
+    result = ParseResult(path)
+    started = time.perf_counter()
+    try:
+        raw, result.engine = read_with_fallback(path, engine)
+        result.memory_before = memory_usage(raw)
+        result.frame, result.unmapped_status = normalize_frame(raw, path, status_map)
+        result.memory_after = memory_usage(result.frame)
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def parse_reports(paths, workers=1, status_map=None, engine=FALLBACK_ENGINE):
+    """Lê as planilhas, em paralelo quando ``workers`` > 1."""
+    parse = partial(parse_report, status_map=status_map, engine=engine)
+    if workers > 1 and len(paths) > 1:
+        context = multiprocessing.get_context(POOL_START_METHOD)
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths)), mp_context=context) as pool:
+            return list(pool.map(parse, paths))
+    return [parse(path) for path in paths]
+
+
+def iter_reports(paths, workers=1, status_map=None, engine=FALLBACK_ENGINE):
+    """Lê as planilhas num único pool e devolve cada resultado assim que fica pronto.
+
+    Com ``workers`` > 1 a ordem é a de término da leitura, não a de ``paths``.
+    """
+    parse = partial(parse_report, status_map=status_map, engine=engine)
+    if workers > 1 and len(paths) > 1:
+        context = multiprocessing.get_context(POOL_START_METHOD)
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths)), mp_context=context) as pool:
+            for future in as_completed([pool.submit(parse, path) for path in paths]):
+                yield future.result()
+        return
+    for path in paths:
+        yield parse(path)
+
+
+def snapshot_version(status_map=None):
+    # O mapeamento de status faz parte da normalização: se mudar, o snapshot é refeito
+    return f"{SCHEMA_VERSION}:{sorted((status_map or {}).items())}"
+
+
+class IncrementalLoader:
+    """Mantém a tabela combinada de faturas sincronizada com a pasta."""
+
+    def __init__(self, pattern, min_interval=60.0, workers=1, cache_dir=None, status_map=None,
+                 debounce=0.0, engine=FALLBACK_ENGINE):
+        self.pattern = pattern
+        self.engine = engine
+        self.progress = LoadProgress()
+        self.min_interval = min_interval
+        # Planilhas modificadas há menos de ``debounce`` segundos ainda podem estar sendo copiadas
+        self.debounce = debounce
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.status_map = status_map
+        self.manifest = {}
+        self.errors = {}
+        # Valores de status fora do mapeamento, por arquivo
+        self.unmapped_status = {}
+        self.frame = pd.DataFrame()
+        # Identifica o conteúdo atual de ``frame``; muda sempre que a tabela muda
+        self.version = None
+        self.last_scan = None
+        self.last_report = None
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def restore(self):
+        """Carrega o último snapshot em disco, se existir."""
+        if not self.cache_dir:
+            return False
+        snapshot = load_snapshot(self.cache_dir, self.snapshot_version())
+        if snapshot is None:
+            return False
+        self.frame, entries, metadata = snapshot
+        self.manifest = {entry['path']: FileFingerprint(**entry) for entry in entries}
+        self.unmapped_status = metadata.get('unmapped_status', {})
+        self._update_version()
+        return True
+
+    def _update_version(self):
+        entries = [vars(fingerprint) for fingerprint in self.manifest.values()]
+        self.version = manifest_key(entries, self.snapshot_version())
+
+    def snapshot_version(self):
+        return snapshot_version(self.status_map)
+
+    def persist(self):
+        """Grava o snapshot e passa a usar a tabela mapeada do arquivo gravado.
+
+        Assim a tabela deste processo fica nas mesmas páginas (compartilhadas)
+        que os processos seguidores abrem, em vez de numa cópia privada.
+        """
+        if not self.cache_dir:
+            return
+        entries = [vars(fingerprint) for fingerprint in self.manifest.values()]
+        try:
+            key = save_snapshot(
+                self.cache_dir, self.frame, entries, self.snapshot_version(),
+                metadata={'unmapped_status': self.unmapped_status, 'errors': self.errors}
+            )
+            self.frame = read_snapshot(self.cache_dir, key)
+        except Exception:
+            # O cache é só uma otimização: falhas não interrompem a carga
+            logger.warning("Não foi possível gravar o snapshot em %s", self.cache_dir, exc_info=True)
+
+    def _fingerprint(self, path, stat):
+        # Tamanho e mtime iguais ao manifesto: reaproveita o hash já calculado
+        previous = self.manifest.get(path) or self._failed.get(path)
+        if previous and previous.size == stat.st_size and previous.mtime == stat.st_mtime:
+            return previous
+        return FileFingerprint(path, stat.st_size, stat.st_mtime, file_hash(path))
+
+    def scan(self):
+        """Compara a pasta com o manifesto e devolve (novos, alterados, removidos)."""
+        current = {}
+        now = time.time()
+        for path in glob.glob(self.pattern):
+            try:
+                stat = os.stat(path)
+                if now - stat.st_mtime < self.debounce:
+                    # Adia a leitura; se já estava no manifesto, mantém a versão anterior
+                    if path in self.manifest:
+                        current[path] = self.manifest[path]
+                    continue
+                current[path] = self._fingerprint(path, stat)
+                if path not in self._failed:
+                    # Erro de leitura do arquivo de uma verificação anterior que já passou
+                    self.errors.pop(path, None)
+            except OSError as e:
+                self.errors[path] = str(e)
+                # Falha passageira num arquivo já lido: mantém as linhas, em vez de tratá-lo como removido
+                if path in self.manifest:
+                    current[path] = self.manifest[path]
+
+        added, changed = [], []
+        for path, fingerprint in current.items():
+            previous = self.manifest.get(path)
+            if previous is None:
+                failed = self._failed.get(path)
+                # Arquivos com erro só são relidos se o conteúdo mudar
+                if failed is None or failed.sha1 != fingerprint.sha1:
+                    added.append(fingerprint)
+            elif previous.sha1 != fingerprint.sha1:
+                changed.append(fingerprint)
+            elif previous != fingerprint:
+                # Só o mtime mudou: atualiza o manifesto sem reler a planilha
+                self.manifest[path] = fingerprint
+
+        removed = [path for path in self.manifest if path not in current]
+        for path in list(self._failed):
+            if path not in current:
+                del self._failed[path]
+                self.errors.pop(path, None)
+        return added, changed, removed
+
+    def _accept(self, result, pending, report):
+        # Registra uma planilha lida; devolve as linhas dela ou None se a leitura falhou
+        path = result.path
+        report.timings[path] = result.seconds
+        if result.error is not None:
+            report.errors[path] = result.error
+            self.errors[path] = result.error
+            self._failed[path] = pending[path]
+            self.manifest.pop(path, None)
+            return None
+        report.memory_before += result.memory_before
+        report.memory_after += result.memory_after
+        if result.unmapped_status:
+            self.unmapped_status[path] = result.unmapped_status
+        else:
+            self.unmapped_status.pop(path, None)
+        self.manifest[path] = pending[path]
+        self._failed.pop(path, None)
+        self.errors.pop(path, None)
+        return result.frame
+
+    def _merge(self, base, paths, parsed):
+        # Junta na ordem de ``paths``, não na de leitura, para que a ordem dos
+        # vencimentos iguais não dependa de qual processo terminou primeiro
+        frames = [base] if not base.empty else []
+        frames += [parsed[path] for path in paths if path in parsed]
+        merged = concat_frames(frames, categorical=('Cliente', SOURCE_COLUMN))
+        # A tabela fica sempre ordenada por vencimento (ver fatura_query)
+        return merged.sort_values('Vencimento', kind='stable', ignore_index=True)
+
+    def refresh(self, force=False, on_partial=None):
+        """Sincroniza a tabela com a pasta.
+
+        Com ``on_partial``, a função é chamada com o carregador sempre que há
+        uma tabela parcial nova em ``frame``: o snapshot restaurado e, durante a
+        leitura, cada vez que o número de linhas dobra. Assim as tabelas
+        parciais custam, somadas, no máximo o mesmo que a tabela completa, que
+        é montada uma única vez ao final.
+        """
+        with self._lock:
+            report = IngestReport()
+            now = time.monotonic()
+            if not force and self.last_scan is not None and now - self.last_scan < self.min_interval:
+                return report
+            started = time.perf_counter()
+            if self.last_scan is None and self.frame.empty:
+                self.restore()
+
+            added, changed, removed = self.scan()
+            pending = {f.path: f for f in added + changed}
+            for path in removed:
+                del self.manifest[path]
+                self.unmapped_status.pop(path, None)
+
+            # Remove linhas de arquivos alterados ou apagados; as novas entram ao final.
+            # Arquivos alterados saem do manifesto até serem relidos, assim a versão das
+            # tabelas parciais corresponde ao que elas contêm
+            stale = [f.path for f in changed] + removed
+            for fingerprint in changed:
+                self.manifest.pop(fingerprint.path, None)
+            if stale and not self.frame.empty:
+                self.frame = self.frame[~self.frame[SOURCE_COLUMN].isin(stale)]
+
+            paths = list(pending)
+            base = self.frame
+            parsed = {}
+            read_rows = 0
+            published = len(base)
+            self.progress.start(len(paths))
+            try:
+                if on_partial is not None and paths and not base.empty:
+                    self._update_version()
+                    on_partial(self)
+                for result in iter_reports(paths, self.workers, self.status_map, self.engine):
+                    frame = self._accept(result, pending, report)
+                    self.progress.done += 1
+                    if frame is None:
+                        continue
+                    parsed[result.path] = frame
+                    read_rows += len(frame)
+                    doubled = len(base) + read_rows >= 2 * published
+                    if on_partial is not None and doubled and self.progress.done < len(paths):
+                        self.frame = self._merge(base, paths, parsed)
+                        published = len(self.frame)
+                        self._update_version()
+                        on_partial(self)
+            finally:
+                self.progress.running = False
+
+            if parsed:
+                self.frame = self._merge(base, paths, parsed)
+            elif stale:
+                self.frame = base.reset_index(drop=True)
+            if stale and not self.frame.empty:
+                # Clientes e arquivos que deixaram de existir saem das categorias
+                for column in ('Cliente', SOURCE_COLUMN):
+                    self.frame[column] = self.frame[column].cat.remove_unused_categories()
+            if report.memory_after:
+                logger.info(
+                    "Planilhas lidas: %.1f MB antes do esquema, %.1f MB depois",
+                    report.memory_before / 2**20, report.memory_after / 2**20
+                )
+
+            report.added = [f.path for f in added]
+            if added or changed or removed:
+                self._update_version()
+                self.persist()
+
+            report.changed = [f.path for f in changed]
+            report.removed = removed
+            report.seconds = time.perf_counter() - started
+            self.last_scan = now
+            self.last_report = report
+            return report
+
+
+class SnapshotFollower:
+    """Acompanha o snapshot gravado pelo ``IncrementalLoader`` de outro processo.
+
+    Com vários processos ou réplicas do servidor, só um deles lê as planilhas;
+    os demais usam este carregador, que apenas abre o snapshot mais recente com
+    memory-mapping. A tabela fica uma única vez na memória da máquina, nas
+    páginas do arquivo compartilhadas pelo sistema operacional.
+    """
+
+    def __init__(self, cache_dir, status_map=None):
+        self.cache_dir = cache_dir
+        self.status_map = status_map
+        self.errors = {}
+        self.unmapped_status = {}
+        self.frame = pd.DataFrame()
+        self.version = None
+        self.last_report = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False, on_partial=None):
+        # Mesma interface do IncrementalLoader; ``on_partial`` nunca é chamada, porque o
+        # seguidor só abre snapshots completos
+        with self._lock:
+            report = IngestReport()
+            started = time.perf_counter()
+            stamp = latest_stamp(self.cache_dir)
+            if stamp is not None and stamp != self._stamp:
+                version = snapshot_version(self.status_map)
+                snapshot = load_snapshot(self.cache_dir, version)
+                if snapshot is not None:
+                    self.frame, entries, metadata = snapshot
+                    self.unmapped_status = metadata.get('unmapped_status', {})
+                    self.errors = metadata.get('errors', {})
+                    self.version = manifest_key(entries, version)
+                    report.errors = dict(self.errors)
+                self._stamp = stamp
+            report.seconds = time.perf_counter() - started
+            self.last_report = report
+            return report
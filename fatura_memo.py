@@ -0,0 +1,54 @@
+"""Memoização das etapas do dashboard (filtro, agregação e gráficos).
+
+Cada etapa é identificada por nome, versão dos dados e estado dos filtros.
+Os resultados ficam em caches LRU limitados: um por sessão e um compartilhado
+entre as sessões do servidor.
+"""
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def memoize(caches, key, compute):
+    """Devolve o valor de ``key`` do primeiro cache que o tiver ou calcula com ``compute()``.
+
+    ``caches`` vai do mais próximo (sessão) ao mais distante (servidor); o
+    resultado é gravado em todos os caches que não o tinham.
+    """
+    missed = []
+    for cache in caches:
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            break
+        missed.append(cache)
+    else:
+        value = compute()
+    for cache in missed:
+        cache.put(key, value)
+    return value
@@ -0,0 +1,153 @@
+"""Medição das etapas de cada execução do dashboard.
+
+Cada etapa registra tempo, linhas de entrada e de saída, variação de memória
+do processo e se o resultado veio do cache. Ao final da execução os tempos
+vão para o painel "Performance" e para o log, uma linha JSON por execução,
+para calcular percentis de latência entre sessões.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def memory_rss():
+    """Memória residente do processo em bytes; None quando não há como medir."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def count_rows(value):
+    # Linhas de um resultado de etapa: tabelas, arrays, contagens e resumos
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, slice):
+        return value.stop - value.start
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    count = getattr(value, 'count', None)
+    return count if isinstance(count, int) else None
+
+
+@dataclass
+class StageTiming:
+    stage: str
+    seconds: float = 0.0
+    rows_in: int = None
+    rows_out: int = None
+    # Variação da memória residente do processo (compartilhada entre as sessões)
+    memory_delta: int = None
+    cached: bool = False
+
+
+class RunRecorder:
+    """Etapas de uma execução do script; desligado, só executa as etapas."""
+
+    def __init__(self, enabled=True, session=None, event='rerun'):
+        self.enabled = enabled
+        self.session = session
+        self.event = event
+        self.stages = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        timing = StageTiming(name, rows_in=rows_in)
+        if not self.enabled:
+            yield timing
+            return
+        before = memory_rss()
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.seconds = time.perf_counter() - started
+            after = memory_rss()
+            if before is not None and after is not None:
+                timing.memory_delta = after - before
+            self.stages.append(timing)
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def record(self):
+        return {
+            'event': self.event,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'session': self.session,
+            'total_seconds': round(self.total, 6),
+            'stages': [asdict(timing) for timing in self.stages]
+        }
+
+    def log(self):
+        if self.enabled:
+            logger.info(json.dumps(self.record(), ensure_ascii=False))
+
+    def frame(self):
+        """Tabela das etapas para exibição."""
+        return pd.DataFrame({
+            'Etapa': [timing.stage for timing in self.stages],
+            'ms': [timing.seconds * 1000 for timing in self.stages],
+            'Linhas (entrada)': pd.array([timing.rows_in for timing in self.stages], dtype='Int64'),
+            'Linhas (saída)': pd.array([timing.rows_out for timing in self.stages], dtype='Int64'),
+            'Memória (MB)': [
+                timing.memory_delta / 2**20 if timing.memory_delta is not None else None
+                for timing in self.stages
+            ],
+            'Cache': [timing.cached for timing in self.stages]
+        })
+
+
+class LatencyHistory:
+    """Duração das últimas execuções de todas as sessões, para percentis."""
+
+    def __init__(self, maxlen=1000):
+        self._totals = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._totals)
+
+    def add(self, seconds):
+        with self._lock:
+            self._totals.append(seconds)
+
+    def percentiles(self, percents=(50, 95, 99)):
+        with self._lock:
+            totals = np.array(self._totals)
+        if not len(totals):
+            return {}
+        return dict(zip(percents, np.percentile(totals, percents)))
+
+
+def configure_log(path):
+    """Grava as linhas JSON das execuções em ``path`` (uma vez por processo)."""
+    path = os.path.abspath(path)
+    for handler in logger.handlers:
+        if getattr(handler, 'baseFilename', None) == path:
+            return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
@@ -0,0 +1,144 @@
+"""Consultas sobre a tabela normalizada de faturas.
+
+A tabela é mantida ordenada por ``Vencimento``, assim um intervalo de datas
+corresponde a um intervalo contínuo de linhas, encontrado por busca binária.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def date_bounds(df, start_date, end_date):
+    """Posições [início, fim) das linhas com vencimento entre as duas datas (inclusive)."""
+    values = df['Vencimento'].to_numpy()
+    start = np.datetime64(pd.Timestamp(start_date), 'ns')
+    end = np.datetime64(pd.Timestamp(end_date) + pd.Timedelta(days=1), 'ns')
+    return int(values.searchsorted(start, 'left')), int(values.searchsorted(end, 'left'))
+
+
+class ClientIndex:
+    """Índice dos clientes, montado uma vez por versão dos dados.
+
+    Guarda os nomes distintos, em ordem alfabética, e as posições das linhas de
+    cada cliente (crescentes, portanto também em ordem de vencimento).
+    """
+
+    def __init__(self, clients):
+        codes = clients.cat.codes.to_numpy()
+        self.names = clients.cat.categories
+        counts = np.bincount(codes + 1, minlength=len(self.names) + 1)
+        # Linhas agrupadas por código; as sem cliente (código -1) ficam no início
+        self.order = np.argsort(codes, kind='stable')
+        self.offsets = np.cumsum(counts)
+
+        lower = self.names.str.lower().to_numpy(dtype=object)
+        self._lower_order = np.argsort(lower, kind='stable')
+        self._lower_sorted = lower[self._lower_order].astype(str)
+
+    def __len__(self):
+        return len(self.names)
+
+    def codes(self, names):
+        # Códigos de categoria dos clientes; nomes desconhecidos são ignorados
+        codes = self.names.get_indexer(list(names))
+        return codes[codes >= 0]
+
+    def rows(self, names, start=0, stop=None):
+        """Posições (ordenadas) das linhas dos clientes, restritas a [start, stop)."""
+        codes = self.codes(names)
+        parts = [self.order[self.offsets[code]:self.offsets[code + 1]] for code in codes]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        rows = np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+        stop = len(self.order) if stop is None else stop
+        return rows[rows.searchsorted(start, 'left'):rows.searchsorted(stop, 'left')]
+
+    def search(self, prefix, limit=100):
+        """Clientes cujo nome começa com ``prefix`` (sem diferenciar maiúsculas).
+
+        Devolve ``(nomes, total)``: até ``limit`` nomes e o total de clientes encontrados.
+        """
+        prefix = prefix.strip().lower()
+        start = self._lower_sorted.searchsorted(prefix, 'left')
+        stop = self._lower_sorted.searchsorted(prefix + '\uffff', 'left') if prefix else len(self._lower_sorted)
+        matches = self._lower_order[start:min(stop, start + limit)]
+        return list(self.names[matches]), int(stop - start)
+
+
+def filter_rows(df, start, stop, statuses=None, client_rows=None):
+    """Posições das linhas que passam pelos filtros, dentro do intervalo [start, stop).
+
+    Sem filtro de clientes e com todos os status devolve um ``slice``, que gera
+    uma fatia sem cópia com ``df.iloc``.
+    """
+    rows = slice(start, stop) if client_rows is None else client_rows
+    status = df['Status']
+    if statuses and set(statuses) != set(status.cat.categories):
+        codes = status.cat.categories.get_indexer(list(statuses))
+        if isinstance(rows, slice):
+            rows = np.arange(start, stop)
+        rows = rows[np.isin(status.cat.codes.to_numpy()[rows], codes)]
+    return rows
+
+
+@dataclass
+class StatusSummary:
+    """Quantidade e valor de faturas por status, na ordem das categorias de Status."""
+    statuses: pd.Index
+    counts: np.ndarray
+    values: np.ndarray
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def total(self):
+        return float(self.values.sum())
+
+    def value_of(self, status):
+        return float(self.values[self.statuses.get_loc(status)])
+
+    @classmethod
+    def from_codes(cls, statuses, codes, values, counts=None):
+        # Uma passada: bincount sobre os códigos de status, com e sem pesos
+        counts = np.ones(len(codes)) if counts is None else counts
+        return cls(
+            statuses,
+            np.bincount(codes, weights=counts, minlength=len(statuses)).astype(np.int64),
+            np.bincount(codes, weights=values, minlength=len(statuses))
+        )
+
+
+def summarize_rows(df, rows):
+    """Resumo por status das linhas ``rows`` (slice ou posições) da tabela."""
+    status = df['Status']
+    return StatusSummary.from_codes(
+        status.cat.categories,
+        status.cat.codes.to_numpy()[rows],
+        df['Valor'].to_numpy()[rows]
+    )
+
+
+def row_count(rows):
+    return rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+
+
+def page_rows(rows, page, page_size, descending=True):
+    """Posições das linhas da página ``page`` (contada a partir de 0).
+
+    Como a tabela já está ordenada por vencimento, a ordem decrescente é só a
+    leitura das posições de trás para frente: o custo é proporcional à página.
+    """
+    count = row_count(rows)
+    first, last = page * page_size, min((page + 1) * page_size, count)
+    if first >= last:
+        return np.empty(0, dtype=np.intp)
+    if descending:
+        first, last = count - last, count - first
+    if isinstance(rows, slice):
+        positions = np.arange(rows.start + first, rows.start + last)
+    else:
+        positions = rows[first:last]
+    return positions[::-1] if descending else positions
@@ -0,0 +1,175 @@
+"""Atualização em segundo plano dos dados do dashboard.
+
+Uma thread verifica a pasta do Rel_441 periodicamente, lê as planilhas novas
+ou alteradas fora do caminho das requisições e monta uma nova versão completa
+do conjunto de dados (tabela e índices). A troca é atômica: as sessões
+continuam vendo a versão anterior até a nova estar pronta. Cada versão é
+somente leitura e compartilhada por todas as sessões, sem cópias.
+
+No modo progressivo a primeira carga também roda na thread, e a tabela
+parcial é publicada como uma versão cada vez que o número de linhas lidas
+dobra, para a página ser exibida antes de a pasta inteira ter sido lida. Só a primeira carga tem
+versões parciais: nas atualizações seguintes as sessões continuam vendo a
+versão anterior completa até a troca.
+"""
+import dataclasses
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from fatura_cube import InvoiceCube
+from fatura_query import ClientIndex
+from fatura_search import NgramIndex, SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _read_only(*indexes):
+    # Índices compartilhados entre as sessões: nenhum array pode ser alterado no lugar
+    for index in indexes:
+        for value in vars(index).values():
+            _freeze(value)
+
+
+def _freeze(value):
+    # Também os arrays dentro de listas, tuplas e do índice de n-gramas da busca
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, NgramIndex):
+        _read_only(value)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Uma versão imutável dos dados, com os índices já montados."""
+    frame: object
+    version: str
+    as_of: datetime
+    client_index: object = None
+    cube: object = None
+    search_index: object = None
+    errors: dict = dataclasses.field(default_factory=dict)
+    unmapped_status: dict = dataclasses.field(default_factory=dict)
+    report: object = None
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    @classmethod
+    def build(cls, frame, version, search_mode='substring', **metadata):
+        if frame.empty:
+            return cls(frame, version, datetime.now(), **metadata)
+        client_index = ClientIndex(frame['Cliente'])
+        cube = InvoiceCube(frame)
+        search_index = SearchIndex(frame, mode=search_mode)
+        _read_only(client_index, cube, search_index)
+        return cls(
+            frame,
+            version,
+            datetime.now(),
+            client_index=client_index,
+            cube=cube,
+            search_index=search_index,
+            **metadata
+        )
+
+
+class Refresher:
+    """Mantém ``dataset`` atualizado a partir de um ``IncrementalLoader``."""
+
+    def __init__(self, loader, interval=60.0, search_mode='substring', progressive=False):
+        self.loader = loader
+        self.interval = interval
+        self.search_mode = search_mode
+        self.progressive = progressive
+        self.dataset = None
+        # True enquanto ``dataset`` é uma versão parcial de uma carga em andamento
+        self.partial = False
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _metadata(self):
+        # Cópias: a thread de atualização continua alterando os dicts do carregador
+        return {
+            'errors': dict(self.loader.errors),
+            'unmapped_status': dict(self.loader.unmapped_status),
+            'report': self.loader.last_report
+        }
+
+    @property
+    def progress(self):
+        """Andamento da leitura das planilhas (None se o carregador não informa)."""
+        return getattr(self.loader, 'progress', None)
+
+    def _publish_partial(self, loader):
+        # Lote lido no meio de uma carga: publica a tabela parcial como uma versão própria
+        self.dataset = Dataset.build(loader.frame, loader.version, self.search_mode, **self._metadata())
+        self.partial = True
+
+    def refresh(self):
+        """Verifica a pasta e, se algo mudou, monta e publica uma nova versão."""
+        with self._lock:
+            try:
+                return self._refresh()
+            finally:
+                self.partial = False
+
+    def _refresh(self):
+        if self.progressive and self.dataset is None:
+            report = self.loader.refresh(force=True, on_partial=self._publish_partial)
+        else:
+            report = self.loader.refresh(force=True)
+        current = self.dataset
+        # A versão muda sempre que a tabela muda (arquivos lidos, alterados ou removidos)
+        if current is None or self.loader.version != current.version:
+            dataset = Dataset.build(
+                self.loader.frame, self.loader.version, self.search_mode, **self._metadata()
+            )
+        elif report.errors or current.errors != self.loader.errors:
+            # Só os avisos mudaram: reaproveita tabela, índices e relatório da carga
+            metadata = self._metadata()
+            metadata.pop('report')
+            dataset = dataclasses.replace(current, **metadata)
+        else:
+            return current
+        # Troca atômica: uma única atribuição de referência
+        self.dataset = dataset
+        return dataset
+
+    def get(self, wait=True):
+        """Versão atual dos dados; na primeira chamada, carrega de forma síncrona.
+
+        Com ``wait=False`` não espera: devolve None enquanto nenhuma versão
+        (nem parcial) foi publicada.
+        """
+        dataset = self.dataset
+        if dataset is None and wait:
+            dataset = self.refresh()
+        return dataset
+
+    def _run(self):
+        if self.progressive and self.dataset is None:
+            # Primeira carga fora das requisições; as sessões veem as versões parciais
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Falha ao carregar os dados em segundo plano")
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Falha ao atualizar os dados em segundo plano")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='fatura-refresher', daemon=True)
+            self._thread.start()
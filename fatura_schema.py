@@ -0,0 +1,174 @@
+"""Esquema tipado da tabela normalizada de faturas.
+
+Mantém só as colunas usadas pelo dashboard, com tipos compactos: ``Cliente`` e
+``Status`` como categorias, ``Valor`` numérico e ``Vencimento`` datetime64.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Incrementar sempre que o esquema ou a normalização mudarem (invalida o cache em disco)
+SCHEMA_VERSION = 3
+
+STATUS_DTYPE = pd.CategoricalDtype(['Paga', 'Em aberto'])
+
+# Valores da coluna LIQUIDADA/ATRASADA -> status do dashboard. As chaves são
+# comparadas sem espaços extras e sem diferença entre maiúsculas e minúsculas.
+STATUS_MAP = {
+    'LIQUIDADO': 'Paga',
+    'ATRASADO': 'Em aberto'
+}
+
+# Status dado às células vazias e aos valores que não estão em STATUS_MAP
+DEFAULT_STATUS = 'Em aberto'
+
+SCHEMA = {
+    'ID': 'string',
+    'Cliente': 'category',
+    'Valor': 'float64',
+    'Vencimento': 'datetime64[ns]',
+    'Status': STATUS_DTYPE
+}
+
+# Colunas da tabela normalizada
+COLUMNS = list(SCHEMA)
+
+# Data zero dos números seriais do Excel (sistema 1900, com o bug de 29/02/1900)
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+# Formatos de datas digitadas como texto, tentados em ordem (dia antes do mês)
+DATE_FORMATS = ['%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%y']
+
+
+def memory_usage(df):
+    # Memória ocupada pelo DataFrame, em bytes, incluindo o conteúdo das strings
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _as_id(values):
+    # Números de fatura lidos como float (por causa de células vazias) voltam a inteiros
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype('Int64')
+    return values.astype('string')
+
+
+def _as_number(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    # Células de texto: aceita tanto "1234.56" quanto o formato brasileiro "1.234,56"
+    text = values.astype('string').str.strip().str.replace('R$', '', regex=False).str.strip()
+    numbers = pd.to_numeric(text, errors='coerce')
+    brl = text.str.contains(',', regex=False, na=False) & numbers.isna()
+    if brl.any():
+        converted = text[brl].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        numbers[brl] = pd.to_numeric(converted, errors='coerce')
+    return numbers.astype('float64')
+
+
+def _from_serial(values):
+    # Números seriais do Excel (dias desde EXCEL_EPOCH) -> datetime64
+    days = pd.to_numeric(values, errors='coerce').astype('float64')
+    return pd.to_datetime(days, unit='D', origin=EXCEL_EPOCH, errors='coerce')
+
+
+def _dates_from_objects(values):
+    # Células mistas (datas, números seriais e textos), já sem repetições
+    result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    kinds = values.map(lambda value: (
+        'date' if isinstance(value, (date, np.datetime64)) else
+        'number' if isinstance(value, (int, float, np.number)) and not isinstance(value, bool) else
+        'text' if isinstance(value, str) else None
+    ))
+    dates = kinds == 'date'
+    result[dates] = pd.to_datetime(values[dates].astype(object), errors='coerce')
+    numbers = kinds == 'number'
+    result[numbers] = _from_serial(values[numbers])
+
+    text = values[kinds == 'text'].astype(str).str.strip()
+    serial = pd.to_numeric(text, errors='coerce')
+    result[serial.dropna().index] = _from_serial(serial.dropna())
+    pending = text[serial.isna()]
+    for date_format in DATE_FORMATS:
+        if pending.empty:
+            break
+        parsed = pd.to_datetime(pending, format=date_format, errors='coerce')
+        result[parsed.dropna().index] = parsed.dropna()
+        pending = pending[parsed.isna()]
+    return result
+
+
+def _as_date(values):
+    """Converte a coluna de vencimento para datetime64 em bloco.
+
+    Aceita datas do Excel, números seriais e textos como "31/01/2024" (sempre
+    dia antes do mês). Colunas mistas são convertidas só nos valores
+    distintos, agrupados por tipo, e expandidas para as linhas pelos códigos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype('datetime64[ns]')
+    if pd.api.types.is_numeric_dtype(values):
+        return _from_serial(values).astype('datetime64[ns]')
+    codes, uniques = pd.factorize(values)
+    converted = _dates_from_objects(pd.Series(uniques, dtype=object)).to_numpy(dtype='datetime64[ns]')
+    converted = np.append(converted, np.datetime64('NaT', 'ns'))  # posição -1: células vazias
+    return pd.Series(converted[codes], index=values.index)
+
+
+def _status_key(values):
+    # "  liquidado " e "LIQUIDADO" viram a mesma chave
+    return values.astype(str).str.split().str.join(' ').str.upper()
+
+
+def normalize_status(values, status_map=None):
+    """Converte os valores brutos de status em uma coluna categórica.
+
+    O mapeamento é feito só sobre os valores distintos e depois expandido para
+    as linhas pelos códigos do ``factorize``. Devolve ``(status, não mapeados)``,
+    onde o segundo item lista os valores brutos que caíram em DEFAULT_STATUS.
+    """
+    lookup = {key.upper(): value for key, value in (status_map or STATUS_MAP).items()}
+    codes, uniques = pd.factorize(values)
+    mapped = _status_key(pd.Series(uniques, dtype=object)).map(lookup)
+    unmapped = [str(uniques[i]) for i in np.flatnonzero(mapped.isna().to_numpy())]
+
+    categories = STATUS_DTYPE.categories
+    default = categories.get_loc(DEFAULT_STATUS)
+    unique_codes = categories.get_indexer(mapped.fillna(DEFAULT_STATUS))
+    unique_codes = np.append(unique_codes, default)  # posição -1: células vazias
+    status = pd.Categorical.from_codes(unique_codes[codes], dtype=STATUS_DTYPE)
+    return pd.Series(status, index=values.index), unmapped
+
+
+def apply_schema(df):
+    """Converte as colunas do dashboard para os tipos do esquema e descarta as demais."""
+    df = df.reindex(columns=COLUMNS)
+    return pd.DataFrame({
+        'ID': _as_id(df['ID']),
+        'Cliente': df['Cliente'].astype('string').astype('category'),
+        'Valor': _as_number(df['Valor']),
+        'Vencimento': _as_date(df['Vencimento']),
+        'Status': df['Status'].astype(STATUS_DTYPE)
+    }, index=df.index)
+
+
+def concat_frames(frames, categorical=('Cliente',)):
+    """Concatena tabelas normalizadas preservando as colunas categóricas.
+
+    ``pd.concat`` transforma em ``object`` categorias que não coincidem, por isso
+    as categorias são unificadas (e ordenadas) antes da concatenação.
+    """
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    for column in categorical:
+        categories = pd.Index(np.unique(np.concatenate([
+            np.asarray(frame[column].cat.categories, dtype=object) for frame in frames
+        ])))
+        frames = [
+            frame.assign(**{column: frame[column].cat.set_categories(categories)})
+            for frame in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
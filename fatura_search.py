@@ -0,0 +1,258 @@
+"""Índice de busca da caixa "Filtrar faturas".
+
+Nenhuma chave de texto é montada por linha. O ID tem um índice de trigramas
+(modo substring) ou os IDs ordenados (modo prefix); Cliente, Valor,
+Vencimento e Status são procurados nos valores distintos de cada coluna,
+formatados uma vez por versão dos dados, e os valores encontrados são
+expandidos para as linhas pelos códigos. As consultas são literais, nunca
+expressões regulares, e devolvem posições de linhas da tabela.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from fatura_format import format_brl_array
+
+# Separador entre os campos da chave; não aparece em textos digitados
+SEPARATOR = '\x1f'
+
+# Tamanho (em bytes) dos n-gramas do índice de IDs
+GRAM = 3
+
+
+def _text_keys(values):
+    return values.astype(str).str.lower()
+
+
+def _valor_keys(values):
+    return values.astype(str) + SEPARATOR + format_brl_array(values).str.lower()
+
+
+def _vencimento_keys(values):
+    return values.dt.strftime('%Y-%m-%d') + SEPARATOR + values.dt.strftime('%d/%m/%Y')
+
+
+# Colunas procuradas pelos valores distintos -> formatação das chaves de busca
+KEY_FORMATS = {'Valor': _valor_keys, 'Vencimento': _vencimento_keys, 'Status': _text_keys}
+
+
+def _distinct(values, format_keys):
+    # Códigos por linha (-1 para ausentes) e chave de busca de cada valor distinto
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+        # Códigos de 32 bits bastam e ocupam metade da memória
+        codes = codes.astype(np.int32)
+    keys = np.asarray(format_keys(pd.Series(uniques)), dtype=object)
+    return codes, pd.Series(keys, dtype='string')
+
+
+def _format_distinct(values, format_keys):
+    # Formata só os valores distintos e expande para as linhas pelos códigos
+    codes, keys = _distinct(values, format_keys)
+    return pd.Series(np.append(keys.to_numpy(dtype=object), '')[codes], index=values.index, dtype='string')
+
+
+def row_keys(df):
+    """Chave de busca (minúsculas) de cada linha: ID, Valor, Vencimento e Status.
+
+    Usada pelas origens SQL e Parquet, que gravam a chave numa coluna.
+    """
+    keys = df['ID'].str.lower().fillna('')
+    for column, format_keys in KEY_FORMATS.items():
+        keys = keys + SEPARATOR + _format_distinct(df[column], format_keys)
+    return keys
+
+
+def id_bytes(ids):
+    """IDs em minúsculas como bytes UTF-8 de tamanho fixo (ausentes viram ``b''``).
+
+    Como o UTF-8 não tem caracteres que comecem no meio de outro, procurar os
+    bytes de um texto equivale a procurar os seus caracteres.
+    """
+    lowered = ids.str.lower().fillna('')
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return np.array(lowered.str.encode('utf-8').to_numpy(dtype=object), dtype=bytes)
+
+    # Bytes copiados direto dos buffers do pyarrow, sem um objeto Python por ID
+    array = pa.array(lowered, type=pa.large_string())
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    _, offsets, data = array.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, dtype=np.uint8)
+    starts, lengths = offsets[:-1], np.diff(offsets)
+    width = max(int(lengths.max()) if len(lengths) else 0, 1)
+    matrix = np.zeros((len(array), width), dtype=np.uint8)
+    for position in range(width):
+        rows = np.flatnonzero(lengths > position)
+        matrix[rows, position] = data[starts[rows] + position]
+    return matrix.view(f'S{width}').ravel()
+
+
+class NgramIndex:
+    """Índice de trigramas dos IDs para a busca de substrings.
+
+    Cada trigrama distinto aponta para as linhas (em ordem) cujo ID o contém.
+    Uma busca cruza as listas dos trigramas do texto, começando pela menor, e
+    confere os candidatos no próprio ID. IDs com menos de três bytes ficam
+    fora do índice e são conferidos diretamente.
+    """
+
+    def __init__(self, ids):
+        self.ids = ids
+        lengths = np.char.str_len(ids)
+        matrix = ids.view(np.uint8).reshape(len(ids), ids.dtype.itemsize)
+
+        # Chave (n-grama << 32 | linha) num único array, montada e ordenada no lugar:
+        # a ordem agrupa as linhas de cada n-grama, já crescentes
+        keys = np.empty(int(np.maximum(lengths - GRAM + 1, 0).sum()), dtype=np.int64)
+        filled = 0
+        for position in range(ids.dtype.itemsize - GRAM + 1):
+            rows = np.flatnonzero(lengths >= position + GRAM)
+            codes = keys[filled:filled + len(rows)]
+            codes[:] = matrix[rows, position]
+            for offset in range(1, GRAM):
+                codes <<= 8
+                codes |= matrix[rows, position + offset]
+            codes <<= 32
+            codes |= rows
+            filled += len(rows)
+        keys.sort()
+        # Os 32 bits de baixo são a linha
+        self.rows = keys.astype(np.int32)
+        keys >>= 32
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+        self.grams = keys[starts].astype(np.int32)
+        self.offsets = np.append(starts, len(keys))
+        self.short = np.flatnonzero((lengths > 0) & (lengths < GRAM))
+
+    def _postings(self, code):
+        position = self.grams.searchsorted(code)
+        if position == len(self.grams) or self.grams[position] != code:
+            return self.rows[:0]
+        return self.rows[self.offsets[position]:self.offsets[position + 1]]
+
+    def _containing(self, needle):
+        # Linhas de todos os n-gramas que contêm ``needle`` (mais curto que um n-grama);
+        # marcadas numa máscara, que sai mais barata que unir listas grandes
+        parts = [(self.grams >> 8 * (GRAM - 1 - position)) & 0xFF for position in range(GRAM)]
+        found = np.zeros(len(self.grams), dtype=bool)
+        for start in range(GRAM - len(needle) + 1):
+            found |= np.logical_and.reduce([parts[start + k] == byte for k, byte in enumerate(needle)])
+        matched = np.zeros(len(self.ids), dtype=bool)
+        for position in np.flatnonzero(found):
+            matched[self.rows[self.offsets[position]:self.offsets[position + 1]]] = True
+        matched[self.short[np.char.find(self.ids[self.short], needle) >= 0]] = True
+        return np.flatnonzero(matched)
+
+    def lookup(self, needle):
+        """Posições ordenadas das linhas cujo ID contém os bytes ``needle``."""
+        if not needle:
+            return np.arange(len(self.ids))
+        if len(needle) < GRAM:
+            return self._containing(needle)
+
+        codes = np.unique([
+            int.from_bytes(needle[start:start + GRAM], 'big') for start in range(len(needle) - GRAM + 1)
+        ])
+        postings = sorted((self._postings(code) for code in codes), key=len)
+        # Listas em ordem de linha: um n-grama repetido no mesmo ID aparece em sequência
+        rows = postings[0]
+        rows = rows[np.r_[True, rows[1:] != rows[:-1]]] if len(rows) else rows
+        for other in postings[1:]:
+            if not len(rows):
+                break
+            rows = rows[np.isin(rows, other, kind='table')]
+        if len(needle) > GRAM and len(rows):
+            # Os trigramas aparecem no ID, mas não necessariamente em sequência
+            rows = rows[np.char.find(self.ids[rows], needle) >= 0]
+        return rows.astype(np.intp)
+
+
+class SearchIndex:
+    """Busca por ID, Cliente, Valor, Vencimento e Status.
+
+    ``mode='substring'`` procura o texto em qualquer posição dos campos;
+    ``mode='prefix'`` só encontra IDs e clientes que começam com o texto, por
+    busca binária, sem percorrer as linhas.
+    """
+
+    def __init__(self, df, mode='substring', cache_size=32):
+        self.mode = mode
+        ids = id_bytes(df['ID'])
+        if mode == 'prefix':
+            self._id_order = np.argsort(ids, kind='stable')
+            self._id_sorted = ids[self._id_order]
+            self._ngrams = None
+        else:
+            self._ngrams = NgramIndex(ids)
+
+        # (códigos por linha, chaves dos valores distintos) de cada coluna; no modo
+        # prefix só os clientes
+        formats = {'Cliente': _text_keys}
+        if mode != 'prefix':
+            formats.update(KEY_FORMATS)
+        self._columns = [_distinct(df[column], format_keys) for column, format_keys in formats.items()]
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def _id_rows(self, term):
+        needle = term.encode('utf-8')
+        if self._ngrams is not None:
+            return self._ngrams.lookup(needle)
+        start = self._id_sorted.searchsorted(needle, 'left')
+        # 0xff nunca aparece em UTF-8: é maior que qualquer continuação do prefixo
+        stop = self._id_sorted.searchsorted(needle + b'\xff', 'left')
+        return np.sort(self._id_order[start:stop])
+
+    def _value_rows(self, term):
+        # Máscara das linhas cujos valores distintos contêm o texto (None se nenhuma),
+        # expandida para as linhas pelos códigos
+        matched = None
+        for codes, keys in self._columns:
+            if self.mode == 'prefix':
+                found = keys.str.startswith(term)
+            else:
+                found = keys.str.contains(term, regex=False)
+            found = found.to_numpy(dtype=bool)
+            if found.any():
+                rows = np.append(found, False)[codes]
+                matched = rows if matched is None else matched | rows
+        return matched
+
+    def _lookup(self, term):
+        rows = self._id_rows(term)
+        matched = self._value_rows(term)
+        if matched is None:
+            return rows
+        matched[rows] = True
+        return np.flatnonzero(matched)
+
+    def lookup(self, term):
+        """Posições ordenadas de todas as linhas da tabela que contêm ``term``."""
+        term = term.strip().lower()
+        with self._lock:
+            if term in self._cache:
+                self._cache.move_to_end(term)
+                return self._cache[term]
+        rows = self._lookup(term)
+        with self._lock:
+            self._cache[term] = rows
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return rows
+
+    def search(self, term, rows):
+        """Restringe ``rows`` (slice ou posições ordenadas) às linhas que contêm ``term``."""
+        matches = self.lookup(term)
+        if isinstance(rows, slice):
+            return matches[matches.searchsorted(rows.start, 'left'):matches.searchsorted(rows.stop, 'left')]
+        return np.intersect1d(rows, matches, assume_unique=True)
@@ -0,0 +1,107 @@
+"""Cache colunar em disco (Feather) da tabela normalizada de faturas.
+
+O snapshot é identificado pelo hash do manifesto da pasta de origem, assim um
+reinício do servidor carrega a tabela já normalizada em vez de ler de novo
+todas as planilhas. O arquivo é gravado sem compressão para poder ser aberto
+com memory-mapping.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+LATEST_FILE = 'latest.json'
+
+
+def manifest_key(entries, version=''):
+    # Só caminho e hash do conteúdo: mudar apenas o mtime não invalida o cache
+    digest = hashlib.sha1(f"{version}\n".encode('utf-8'))
+    for entry in sorted(entries, key=lambda entry: entry['path']):
+        digest.update(f"{entry['path']}\0{entry['sha1']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def atomic_write(path, write):
+    # Grava em arquivo temporário e renomeia, para nunca expor um arquivo pela metade
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_snapshot(cache_dir, frame, entries, version='', metadata=None):
+    """Grava a tabela e o manifesto (lista de dicts path/size/mtime/sha1).
+
+    ``version`` identifica o esquema da tabela: snapshots de outra versão são
+    ignorados. ``metadata`` é um dict serializável em JSON guardado junto.
+    """
+    key = manifest_key(entries, version)
+    os.makedirs(cache_dir, exist_ok=True)
+    data_file = os.path.join(cache_dir, f"invoices-{key}.feather")
+    if not os.path.exists(data_file):
+        table = frame.reset_index(drop=True)
+        atomic_write(data_file, lambda tmp: table.to_feather(tmp, compression='uncompressed'))
+
+    payload = json.dumps({'key': key, 'manifest': entries, 'metadata': metadata or {}})
+
+    def write_latest(tmp):
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            fh.write(payload)
+
+    atomic_write(os.path.join(cache_dir, LATEST_FILE), write_latest)
+
+    # Remove snapshots antigos
+    for old in glob.glob(os.path.join(cache_dir, 'invoices-*.feather')):
+        if old != data_file:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return key
+
+
+def read_snapshot(cache_dir, key):
+    """Abre a tabela do snapshot ``key`` com memory-mapping, sem copiá-la.
+
+    As colunas apontam para as páginas do arquivo, compartilhadas pelo sistema
+    operacional entre todos os processos que abrem o mesmo snapshot, e não
+    podem ser alteradas no lugar.
+    """
+    import pyarrow.feather as feather
+
+    table = feather.read_table(os.path.join(cache_dir, f"invoices-{key}.feather"), memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def latest_stamp(cache_dir):
+    # Identifica a gravação atual de latest.json, para saber se há snapshot novo sem lê-lo
+    try:
+        stat = os.stat(os.path.join(cache_dir, LATEST_FILE))
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_snapshot(cache_dir, version=''):
+    """Devolve (frame, entradas do manifesto, metadata) do último snapshot ou None."""
+    try:
+        with open(os.path.join(cache_dir, LATEST_FILE), encoding='utf-8') as fh:
+            latest = json.load(fh)
+        entries = latest['manifest']
+        if manifest_key(entries, version) != latest['key']:
+            return None
+        return read_snapshot(cache_dir, latest['key']), entries, latest.get('metadata', {})
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning("Snapshot em %s ignorado", cache_dir, exc_info=True)
+        return None
@@ -0,0 +1,739 @@
+"""Origens dos dados do dashboard.
+
+- ``ExcelFolderSource``: planilhas do Rel_441, lidas e mantidas em memória.
+- ``StoreSource`` com ``ParquetView``: arquivo Parquet já normalizado; os
+  filtros são aplicados na leitura e só as colunas necessárias são lidas.
+- ``StoreSource`` com ``SQLView``: banco SQLite ou DuckDB; filtros, contagens
+  e somas por período viram consultas SQL.
+
+``current()`` devolve uma visão imutável de uma versão dos dados, sempre com
+as mesmas operações (intervalo de datas, busca de clientes, resumo por status,
+soma por período, aging, contagem, página da tabela e exportação). Nas origens
+Parquet e SQL só os agregados e a página visível voltam para o Python.
+
+O arquivo Parquet ou o banco é gerado a partir da pasta de planilhas com::
+
+    python fatura_source.py "K:\\RelatoriosFinanceiros\\Rel_441\\*.xlsx" faturas.db --engine sqlite
+"""
+import argparse
+import contextlib
+import dataclasses
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fatura_aging import OPEN_STATUS, aging_summary, empty_aging
+from fatura_cube import InvoiceCube
+from fatura_export import CHUNK_ROWS, EXPORT_COLUMNS, export_chunks, export_rows
+from fatura_memo import LRUCache, memoize
+from fatura_query import (
+    ClientIndex, StatusSummary, date_bounds, filter_rows, page_rows, row_count, summarize_rows
+)
+from fatura_schema import STATUS_DTYPE
+from fatura_search import row_keys
+from fatura_snapshot import atomic_write
+
+# Arquivos dentro da pasta da origem Parquet
+PARQUET_INVOICES = 'faturas.parquet'
+PARQUET_CLIENTS = 'clientes.parquet'
+
+# Linhas por row group do Parquet: as estatísticas de Vencimento de cada grupo
+# permitem pular os grupos fora do intervalo de datas
+PARQUET_ROW_GROUP = 64_000
+
+# Formato de data e hora gravado no SQLite (texto ISO, comparável como string)
+SQLITE_TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+
+@dataclass(frozen=True)
+class InvoiceFilter:
+    """Filtros do dashboard; datas inclusivas, tuplas vazias = sem filtro."""
+    start_date: date
+    end_date: date
+    statuses: tuple = ()
+    clients: tuple = ()
+    search: str = ''
+
+    @property
+    def unsearched(self):
+        return dataclasses.replace(self, search='') if self.search else self
+
+    @property
+    def stop(self):
+        # Limite superior exclusivo: início do dia seguinte a end_date
+        return pd.Timestamp(self.end_date) + pd.Timedelta(days=1)
+
+
+class InvoiceView(ABC):
+    """Uma versão dos dados, com as consultas usadas pelo dashboard.
+
+    Uma visão que não implementa todas as consultas falha ao ser criada, e não
+    no meio de uma execução do dashboard.
+    """
+    version = ''
+    as_of = None
+    errors = {}
+    unmapped_status = {}
+    report = None
+    search_mode = 'substring'
+
+    @property
+    def empty(self):
+        return self.date_range() is None
+
+    @property
+    @abstractmethod
+    def size(self):
+        """Total de faturas desta versão, sem filtros."""
+
+    @abstractmethod
+    def date_range(self):
+        """(primeiro, último) vencimento como ``date``; None sem faturas."""
+
+    @abstractmethod
+    def search_clients(self, prefix, limit=100):
+        """Como ``ClientIndex.search``: ``(nomes, total)`` dos clientes que começam com ``prefix``."""
+
+    @abstractmethod
+    def summary(self, filters):
+        """``StatusSummary`` das faturas que passam pelos filtros."""
+
+    @abstractmethod
+    def period_summary(self, filters, freq='D'):
+        """Soma de Valor por período e status, como ``InvoiceCube.period_summary``."""
+
+    @abstractmethod
+    def aging(self, filters, reference, freq='M'):
+        """``AgingSummary`` das faturas em aberto que passam pelos filtros, na data ``reference``."""
+
+    @abstractmethod
+    def count(self, filters):
+        """Quantidade de faturas que passam pelos filtros."""
+
+    @abstractmethod
+    def page(self, filters, page, page_size):
+        """Linhas da página ``page`` (a partir de 0), vencimentos mais recentes primeiro."""
+
+    @abstractmethod
+    def export(self, filters, export_format, progress=None, reference=None):
+        """Conteúdo (bytes) do arquivo exportado com as faturas filtradas, em ordem de vencimento.
+
+        Com ``reference``, inclui dias e faixa de atraso nessa data.
+        """
+
+
+class FrameView(InvoiceView):
+    """Consultas sobre a tabela em memória de um ``Dataset`` (cubo e índices prontos)."""
+
+    def __init__(self, dataset, cache_size=32):
+        self.dataset = dataset
+        self.frame = dataset.frame
+        self.version = dataset.version
+        self.as_of = dataset.as_of
+        self.errors = dataset.errors
+        self.unmapped_status = dataset.unmapped_status
+        self.report = dataset.report
+        self._rows = LRUCache(cache_size)
+
+    @property
+    def empty(self):
+        return self.dataset.empty
+
+    @property
+    def size(self):
+        return len(self.frame)
+
+    def date_range(self):
+        if self.empty:
+            return None
+        # A tabela vem ordenada por vencimento: primeira e última linha são os extremos
+        vencimento = self.frame['Vencimento']
+        return vencimento.iloc[0].date(), vencimento.iloc[-1].date()
+
+    def search_clients(self, prefix, limit=100):
+        return self.dataset.client_index.search(prefix, limit)
+
+    def rows(self, filters):
+        """Posições (slice ou array ordenado) das linhas que passam pelos filtros."""
+        return memoize([self._rows], filters, lambda: self._filter_rows(filters))
+
+    def _filter_rows(self, filters):
+        if filters.search:
+            return self.dataset.search_index.search(filters.search, self.rows(filters.unsearched))
+        start, stop = date_bounds(self.frame, filters.start_date, filters.end_date)
+        client_index = self.dataset.client_index
+        client_rows = client_index.rows(filters.clients, start, stop) if filters.clients else None
+        return filter_rows(self.frame, start, stop, filters.statuses, client_rows)
+
+    def _client_codes(self, filters):
+        return self.dataset.client_index.codes(filters.clients) if filters.clients else None
+
+    def summary(self, filters):
+        if filters.search:
+            return summarize_rows(self.frame, self.rows(filters))
+        return self.dataset.cube.summary(
+            filters.start_date, filters.end_date, filters.statuses, self._client_codes(filters)
+        )
+
+    def period_summary(self, filters, freq='D'):
+        if filters.search:
+            cube = InvoiceCube(self.frame.iloc[self.rows(filters)])
+            return cube.period_summary(filters.start_date, filters.end_date, freq)
+        return self.dataset.cube.period_summary(
+            filters.start_date, filters.end_date, freq, filters.statuses, self._client_codes(filters)
+        )
+
+    def aging(self, filters, reference, freq='M'):
+        if not _includes_open(filters):
+            return empty_aging(reference)
+        if filters.search:
+            df = self.frame.iloc[self.rows(filters)]
+            df = df[df['Status'] == OPEN_STATUS]
+            return aging_summary(
+                df['Vencimento'].to_numpy(), df['Cliente'].array, df['Valor'].to_numpy(), reference, freq=freq
+            )
+        # Células do cubo (dia x status x cliente) em vez das linhas: já trazem soma e quantidade
+        cube = self.dataset.cube
+        cells = cube.select(filters.start_date, filters.end_date, (OPEN_STATUS,), self._client_codes(filters))
+        clients = pd.Categorical.from_codes(cube.client[cells], dtype=self.frame['Cliente'].dtype)
+        return aging_summary(cube.day[cells], clients, cube.total[cells], reference, cube.count[cells], freq)
+
+    def count(self, filters):
+        return row_count(self.rows(filters))
+
+    def page(self, filters, page, page_size):
+        return self.frame.iloc[page_rows(self.rows(filters), page, page_size)][EXPORT_COLUMNS]
+
+    def export(self, filters, export_format, progress=None, reference=None):
+        return export_rows(self.frame, self.rows(filters), export_format, progress=progress, reference=reference)
+
+
+class ExcelFolderSource:
+    """Pasta de planilhas do Rel_441, mantida em memória por um ``Refresher``."""
+
+    def __init__(self, refresher):
+        self.refresher = refresher
+        self._view = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.refresher.dataset is not None
+
+    @property
+    def loading(self):
+        """Primeira carga ainda sem versão publicada, ou versão atual parcial."""
+        return self.refresher.dataset is None or self.refresher.partial
+
+    @property
+    def progress(self):
+        return self.refresher.progress
+
+    def current(self, wait=True):
+        """Visão da versão atual; com ``wait=False``, None enquanto nada foi carregado."""
+        dataset = self.refresher.get(wait)
+        if dataset is None:
+            return None
+        with self._lock:
+            if self._view is None or self._view.dataset is not dataset:
+                self._view = FrameView(dataset)
+            return self._view
+
+
+def _includes_open(filters):
+    # Com o filtro de status só em "Paga" não há faturas em aberto para o aging
+    return not filters.statuses or OPEN_STATUS in filters.statuses
+
+
+def _status_summary(statuses, totals):
+    # totals: {status: (quantidade, soma)} -> StatusSummary na ordem das categorias
+    statuses = pd.Index(statuses)
+    counts = np.zeros(len(statuses), dtype=np.int64)
+    values = np.zeros(len(statuses))
+    for status, (count, value) in totals.items():
+        if status in statuses:
+            counts[statuses.get_loc(status)] = count
+            values[statuses.get_loc(status)] = value or 0.0
+    return StatusSummary(statuses, counts, values)
+
+
+def _period_frame(statuses, periods, status, values):
+    # Linhas (período, status, soma) -> uma coluna por status, períodos em ordem cronológica
+    sums = pd.DataFrame({'Periodo': pd.to_datetime(periods), 'Status': status, 'Valor': values})
+    table = sums.pivot_table(index='Periodo', columns='Status', values='Valor', aggfunc='sum')
+    table = table.reindex(columns=statuses, fill_value=0.0).fillna(0.0).sort_index()
+    table.index = pd.DatetimeIndex(table.index.astype('datetime64[ns]'), name='Periodo')
+    table.columns = pd.Index(statuses)
+    return table
+
+
+def _result_frame(records, columns):
+    # Registros vindos do SQL ou do Parquet -> tabela com os mesmos tipos da tabela em memória
+    df = pd.DataFrame.from_records(records, columns=columns) if not isinstance(records, pd.DataFrame) else records
+    df = df.astype({'ID': 'string', 'Cliente': 'category', 'Valor': 'float64'})
+    df['Vencimento'] = pd.to_datetime(df['Vencimento']).astype('datetime64[ns]')
+    df['Status'] = df['Status'].astype(STATUS_DTYPE)
+    return df[EXPORT_COLUMNS]
+
+
+def _search_pattern(term, mode):
+    # Padrão LIKE literal: %, _ e \ digitados não são curingas
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%" if mode == 'prefix' else f"%{escaped}%"
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}", datetime.fromtimestamp(stat.st_mtime)
+
+
+class SQLView(InvoiceView):
+    """Consultas num banco SQLite ou DuckDB gerado por ``write_sql_store``."""
+
+    # Por engine: parâmetro de data/hora e truncamento do vencimento por período
+    DIALECTS = {
+        'sqlite': {
+            'timestamp': '?',
+            'period': {
+                'D': "substr(Vencimento, 1, 10)",
+                'M': "substr(Vencimento, 1, 7) || '-01'",
+                'Y': "substr(Vencimento, 1, 4) || '-01-01'"
+            }
+        },
+        'duckdb': {
+            'timestamp': 'CAST(? AS TIMESTAMP)',
+            'period': {
+                'D': "date_trunc('day', Vencimento)",
+                'M': "date_trunc('month', Vencimento)",
+                'Y': "date_trunc('year', Vencimento)"
+            }
+        }
+    }
+
+    def __init__(self, path, engine='sqlite', search_mode='substring'):
+        self.path = path
+        self.engine = engine
+        self.search_mode = search_mode
+        self.dialect = self.DIALECTS[engine]
+        self.version, self.as_of = _file_version(path)
+
+    def _connect(self):
+        if self.engine == 'duckdb':
+            import duckdb
+            return duckdb.connect(self.path, read_only=True)
+        return sqlite3.connect(Path(self.path).resolve().as_uri() + '?mode=ro', uri=True)
+
+    def _fetch(self, sql, params=(), one=False):
+        with contextlib.closing(self._connect()) as conn:
+            cursor = conn.execute(sql, list(params))
+            return cursor.fetchone() if one else cursor.fetchall()
+
+    def _where(self, filters):
+        timestamp = self.dialect['timestamp']
+        clauses = [f"Vencimento >= {timestamp}", f"Vencimento < {timestamp}"]
+        params = [
+            pd.Timestamp(filters.start_date).strftime(SQLITE_TIMESTAMP),
+            filters.stop.strftime(SQLITE_TIMESTAMP)
+        ]
+        for column, values in (('Status', filters.statuses), ('Cliente', filters.clients)):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if filters.search:
+            pattern = _search_pattern(filters.search, self.search_mode)
+            clauses.append("(busca LIKE ? ESCAPE '\\' OR cliente_busca LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        return ' AND '.join(clauses), params
+
+    @cached_property
+    def _date_range(self):
+        first, last = self._fetch("SELECT MIN(Vencimento), MAX(Vencimento) FROM faturas", one=True)
+        if first is None:
+            return None
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def date_range(self):
+        return self._date_range
+
+    @cached_property
+    def size(self):
+        (count,) = self._fetch("SELECT COUNT(*) FROM faturas", one=True)
+        return int(count)
+
+    def search_clients(self, prefix, limit=100):
+        prefix = prefix.strip().lower()
+        where, params = '', []
+        if prefix:
+            where, params = "WHERE busca >= ? AND busca < ?", [prefix, prefix + '\uffff']
+        (total,) = self._fetch(f"SELECT COUNT(*) FROM clientes {where}", params, one=True)
+        names = self._fetch(f"SELECT Cliente FROM clientes {where} ORDER BY busca LIMIT ?", params + [limit])
+        return [name for (name,) in names], int(total)
+
+    def summary(self, filters):
+        where, params = self._where(filters)
+        totals = self._fetch(
+            f"SELECT Status, COUNT(*), SUM(Valor) FROM faturas WHERE {where} GROUP BY Status", params
+        )
+        return _status_summary(STATUS_DTYPE.categories, {status: (count, value) for status, count, value in totals})
+
+    def period_summary(self, filters, freq='D'):
+        where, params = self._where(filters)
+        period = self.dialect['period'][freq]
+        sums = self._fetch(
+            f"SELECT {period} AS periodo, Status, SUM(Valor) FROM faturas "
+            f"WHERE {where} GROUP BY periodo, Status ORDER BY periodo", params
+        )
+        periods, status, values = zip(*sums) if sums else ((), (), ())
+        return _period_frame(STATUS_DTYPE.categories, periods, status, values)
+
+    def aging(self, filters, reference, freq='M'):
+        if not _includes_open(filters):
+            return empty_aging(reference)
+        # Soma e quantidade por dia e cliente; as faixas são calculadas no Python
+        where, params = self._where(filters)
+        day = self.dialect['period']['D']
+        cells = self._fetch(
+            f"SELECT {day} AS dia, Cliente, SUM(Valor), COUNT(*) FROM faturas "
+            f"WHERE {where} AND Status = ? GROUP BY dia, Cliente", params + [OPEN_STATUS]
+        )
+        days, clients, values, counts = zip(*cells) if cells else ((), (), (), ())
+        return aging_summary(
+            pd.to_datetime(list(days)).to_numpy(dtype='datetime64[ns]'), list(clients), values, reference,
+            counts, freq
+        )
+
+    def count(self, filters):
+        where, params = self._where(filters)
+        (count,) = self._fetch(f"SELECT COUNT(*) FROM faturas WHERE {where}", params, one=True)
+        return int(count)
+
+    def page(self, filters, page, page_size):
+        # pos é a ordem da tabela em memória: a mesma ordenação da origem xlsx
+        where, params = self._where(filters)
+        records = self._fetch(
+            f"SELECT {', '.join(EXPORT_COLUMNS)} FROM faturas WHERE {where} "
+            f"ORDER BY pos DESC LIMIT ? OFFSET ?", params + [page_size, page * page_size]
+        )
+        return _result_frame(records, EXPORT_COLUMNS)
+
+    def _iter_chunks(self, filters):
+        where, params = self._where(filters)
+        with contextlib.closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"SELECT {', '.join(EXPORT_COLUMNS)} FROM faturas WHERE {where} ORDER BY pos", params
+            )
+            while True:
+                records = cursor.fetchmany(CHUNK_ROWS)
+                if not records:
+                    break
+                yield _result_frame(records, EXPORT_COLUMNS)
+
+    def export(self, filters, export_format, progress=None, reference=None):
+        return export_chunks(self._iter_chunks(filters), self.count(filters), export_format, progress, reference)
+
+
+class ParquetView(InvoiceView):
+    """Consultas numa pasta gerada por ``write_parquet_store``, lida com ``pyarrow.dataset``.
+
+    Os filtros viram expressões do pyarrow, aplicadas durante a leitura; as
+    somas são feitas bloco a bloco, sem montar a tabela filtrada inteira.
+    """
+
+    def __init__(self, path, search_mode='substring'):
+        import pyarrow.dataset as ds
+
+        self.path = path
+        self.search_mode = search_mode
+        invoices = os.path.join(path, PARQUET_INVOICES)
+        self.version, self.as_of = _file_version(invoices)
+        self.dataset = ds.dataset(invoices, format='parquet')
+
+    def _expression(self, filters):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        timestamp = pa.timestamp('ns')
+        vencimento = pc.field('Vencimento')
+        expression = (
+            (vencimento >= pa.scalar(pd.Timestamp(filters.start_date), timestamp))
+            & (vencimento < pa.scalar(filters.stop, timestamp))
+        )
+        if filters.statuses:
+            expression &= pc.field('Status').isin(list(filters.statuses))
+        if filters.clients:
+            expression &= pc.field('Cliente').isin(list(filters.clients))
+        if filters.search:
+            match = pc.starts_with if self.search_mode == 'prefix' else pc.match_substring
+            expression &= (
+                match(pc.field('busca'), filters.search) | match(pc.field('cliente_busca'), filters.search)
+            )
+        return expression
+
+    def _batches(self, filters, columns):
+        return self.dataset.to_batches(columns=columns, filter=self._expression(filters))
+
+    @cached_property
+    def _date_range(self):
+        import pyarrow.compute as pc
+
+        bounds = [
+            pc.min_max(batch.column('Vencimento'))
+            for batch in self.dataset.to_batches(columns=['Vencimento']) if batch.num_rows
+        ]
+        if not bounds:
+            return None
+        first = min(bound['min'].as_py() for bound in bounds)
+        last = max(bound['max'].as_py() for bound in bounds)
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def date_range(self):
+        return self._date_range
+
+    @cached_property
+    def size(self):
+        return self.dataset.count_rows()
+
+    @cached_property
+    def _client_index(self):
+        import pyarrow.parquet as pq
+
+        names = pq.read_table(os.path.join(self.path, PARQUET_CLIENTS), columns=['Cliente'])
+        return ClientIndex(names.column('Cliente').to_pandas().astype('category'))
+
+    def search_clients(self, prefix, limit=100):
+        return self._client_index.search(prefix, limit)
+
+    def summary(self, filters):
+        statuses = STATUS_DTYPE.categories
+        counts = np.zeros(len(statuses), dtype=np.int64)
+        values = np.zeros(len(statuses))
+        for batch in self._batches(filters, ['Status', 'Valor']):
+            codes = statuses.get_indexer(batch.column('Status').to_numpy(zero_copy_only=False))
+            counts += np.bincount(codes, minlength=len(statuses))
+            values += np.bincount(codes, weights=batch.column('Valor').to_numpy(), minlength=len(statuses))
+        return StatusSummary(statuses, counts, values)
+
+    def period_summary(self, filters, freq='D'):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        unit = {'D': 'day', 'M': 'month', 'Y': 'year'}[freq]
+        parts = []
+        for batch in self._batches(filters, ['Vencimento', 'Status', 'Valor']):
+            table = pa.table({
+                'periodo': pc.floor_temporal(batch.column('Vencimento'), unit=unit),
+                'Status': batch.column('Status'),
+                'Valor': batch.column('Valor')
+            })
+            parts.append(table.group_by(['periodo', 'Status']).aggregate([('Valor', 'sum')]))
+        sums = pa.concat_tables(parts).group_by(['periodo', 'Status']).aggregate([('Valor_sum', 'sum')]) if parts else None
+        if sums is None or not sums.num_rows:
+            return _period_frame(STATUS_DTYPE.categories, [], [], [])
+        return _period_frame(
+            STATUS_DTYPE.categories,
+            sums.column('periodo').to_numpy(),
+            sums.column('Status').to_numpy(zero_copy_only=False),
+            sums.column('Valor_sum_sum').to_numpy()
+        )
+
+    def aging(self, filters, reference, freq='M'):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if not _includes_open(filters):
+            return empty_aging(reference)
+        # Soma e quantidade por dia e cliente, bloco a bloco, como em period_summary
+        expression = self._expression(filters) & (pc.field('Status') == OPEN_STATUS)
+        parts = []
+        for batch in self.dataset.to_batches(columns=['Vencimento', 'Cliente', 'Valor'], filter=expression):
+            table = pa.table({
+                'dia': pc.floor_temporal(batch.column('Vencimento'), unit='day'),
+                'Cliente': batch.column('Cliente'),
+                'Valor': batch.column('Valor')
+            })
+            parts.append(table.group_by(['dia', 'Cliente']).aggregate([('Valor', 'sum'), ('Valor', 'count')]))
+        if not parts:
+            return empty_aging(reference)
+        cells = pa.concat_tables(parts).group_by(['dia', 'Cliente']).aggregate(
+            [('Valor_sum', 'sum'), ('Valor_count', 'sum')]
+        )
+        return aging_summary(
+            cells.column('dia').to_numpy(),
+            cells.column('Cliente').to_numpy(zero_copy_only=False),
+            cells.column('Valor_sum_sum').to_numpy(),
+            reference,
+            cells.column('Valor_count_sum').to_numpy(),
+            freq
+        )
+
+    def count(self, filters):
+        return self.dataset.count_rows(filter=self._expression(filters))
+
+    def page(self, filters, page, page_size):
+        import pyarrow.compute as pc
+
+        # Posições da página, lidas só da coluna pos; depois as linhas dessas posições
+        count = self.count(filters)
+        first, last = page * page_size, min((page + 1) * page_size, count)
+        wanted = np.empty(0, dtype=np.int64)
+        if first < last:
+            first, last = count - last, count - first
+            parts, seen = [], 0
+            for batch in self._batches(filters, ['pos']):
+                if seen + batch.num_rows > first:
+                    parts.append(batch.column('pos').to_numpy()[max(0, first - seen):last - seen])
+                seen += batch.num_rows
+                if seen >= last:
+                    break
+            wanted = np.concatenate(parts) if parts else wanted
+        table = self.dataset.to_table(columns=['pos'] + EXPORT_COLUMNS, filter=pc.field('pos').isin(wanted))
+        df = table.to_pandas().sort_values('pos', ascending=False, ignore_index=True)
+        return _result_frame(df, EXPORT_COLUMNS)
+
+    def _iter_chunks(self, filters):
+        for batch in self._batches(filters, EXPORT_COLUMNS):
+            if batch.num_rows:
+                yield _result_frame(batch.to_pandas(), EXPORT_COLUMNS)
+
+    def export(self, filters, export_format, progress=None, reference=None):
+        return export_chunks(self._iter_chunks(filters), self.count(filters), export_format, progress, reference)
+
+
+class StoreSource:
+    """Arquivo Parquet ou banco SQL; uma nova visão a cada vez que o arquivo muda."""
+
+    def __init__(self, kind, path, search_mode='substring'):
+        self.kind = kind
+        self.path = path
+        self.search_mode = search_mode
+        self._view = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return True
+
+    # Abrir o arquivo não lê a tabela: não há carga a acompanhar
+    loading = False
+    progress = None
+
+    def _open(self):
+        if self.kind == 'parquet':
+            return ParquetView(self.path, search_mode=self.search_mode)
+        return SQLView(self.path, engine=self.kind, search_mode=self.search_mode)
+
+    def current(self, wait=True):
+        target = os.path.join(self.path, PARQUET_INVOICES) if self.kind == 'parquet' else self.path
+        version, _ = _file_version(target)
+        with self._lock:
+            if self._view is None or self._view.version != version:
+                self._view = self._open()
+            return self._view
+
+
+def store_frame(frame):
+    """Tabela gravada nas origens Parquet e SQL: colunas do dashboard, ordem e chaves de busca."""
+    return pd.DataFrame({
+        'pos': np.arange(len(frame), dtype=np.int64),
+        'ID': frame['ID'].astype(object),
+        'Cliente': frame['Cliente'].astype(object),
+        'Valor': frame['Valor'].to_numpy(),
+        'Vencimento': frame['Vencimento'].to_numpy(),
+        'Status': frame['Status'].astype(object),
+        'busca': row_keys(frame).astype(object),
+        'cliente_busca': frame['Cliente'].astype('string').str.lower().astype(object)
+    })
+
+
+def _client_frame(frame):
+    names = pd.Series(frame['Cliente'].cat.categories, dtype=object)
+    return pd.DataFrame({'Cliente': names, 'busca': names.str.lower()})
+
+
+def write_parquet_store(frame, path):
+    """Grava ``faturas.parquet`` e ``clientes.parquet`` na pasta ``path``."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(path, exist_ok=True)
+    clients = pa.Table.from_pandas(_client_frame(frame), preserve_index=False)
+    atomic_write(os.path.join(path, PARQUET_CLIENTS), lambda tmp: pq.write_table(clients, tmp))
+    invoices = pa.Table.from_pandas(store_frame(frame), preserve_index=False)
+    atomic_write(
+        os.path.join(path, PARQUET_INVOICES),
+        lambda tmp: pq.write_table(invoices, tmp, row_group_size=PARQUET_ROW_GROUP)
+    )
+
+
+def write_sql_store(frame, path, engine='sqlite'):
+    """Grava as tabelas ``faturas`` e ``clientes`` (com índices) num banco novo em ``path``."""
+    invoices, clients = store_frame(frame), _client_frame(frame)
+
+    def write(tmp):
+        # O arquivo temporário precisa ser criado pela própria engine
+        os.remove(tmp)
+        if engine == 'duckdb':
+            import duckdb
+            conn = duckdb.connect(tmp)
+        else:
+            conn = sqlite3.connect(tmp)
+        with contextlib.closing(conn):
+            if engine == 'duckdb':
+                conn.register('faturas_df', invoices)
+                conn.register('clientes_df', clients)
+                conn.execute("CREATE TABLE faturas AS SELECT * FROM faturas_df")
+                conn.execute("CREATE TABLE clientes AS SELECT * FROM clientes_df")
+            else:
+                # Vencimento como texto ISO: comparações e truncamentos viram operações de string
+                vencimento = frame['Vencimento'].dt.strftime(SQLITE_TIMESTAMP).to_numpy()
+                invoices.assign(Vencimento=vencimento).to_sql('faturas', conn, index=False, chunksize=CHUNK_ROWS)
+                clients.to_sql('clientes', conn, index=False)
+            conn.execute("CREATE INDEX faturas_vencimento ON faturas (Vencimento)")
+            conn.execute("CREATE INDEX faturas_cliente ON faturas (Cliente, Vencimento)")
+            conn.execute("CREATE INDEX clientes_busca ON clientes (busca)")
+            conn.commit()
+
+    atomic_write(path, write)
+
+
+def open_source(kind, path=None, refresher=None, search_mode='substring'):
+    """Origem configurada: 'xlsx' (precisa de ``refresher``), 'parquet', 'sqlite' ou 'duckdb'."""
+    if kind == 'xlsx':
+        return ExcelFolderSource(refresher)
+    if kind not in ('parquet', 'sqlite', 'duckdb'):
+        raise ValueError(f"Origem de dados desconhecida: {kind}")
+    return StoreSource(kind, path, search_mode=search_mode)
+
+
+def main(argv=None):
+    from fatura_ingest import EXCEL_ENGINES, IncrementalLoader
+
+    parser = argparse.ArgumentParser(description="Gera a origem Parquet ou SQL a partir das planilhas do Rel_441.")
+    parser.add_argument('pattern', help="padrão glob das planilhas, ex.: K:\\Rel_441\\*.xlsx")
+    parser.add_argument('target', help="pasta (parquet) ou arquivo do banco (sqlite/duckdb)")
+    parser.add_argument('--engine', choices=['parquet', 'sqlite', 'duckdb'], default='sqlite')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--reader', choices=list(EXCEL_ENGINES), default='calamine', help="engine de leitura das planilhas")
+    args = parser.parse_args(argv)
+
+    loader = IncrementalLoader(args.pattern, workers=args.workers, engine=args.reader)
+    report = loader.refresh(force=True)
+    for file, error in report.errors.items():
+        print(f"Erro ao ler o arquivo {file}: {error}")
+    if args.engine == 'parquet':
+        write_parquet_store(loader.frame, args.target)
+    else:
+        write_sql_store(loader.frame, args.target, engine=args.engine)
+    print(f"{len(loader.frame)} faturas gravadas em {args.target}")
+
+
+if __name__ == '__main__':
+    main()